@@ -0,0 +1,99 @@
+"""
+Cold Start Benchmark
+Boots a fresh uvicorn worker N times and measures time-to-first-200 on
+GET /api/books, plus the worker's own startup breakdown from /api/health
+
+Usage:
+    python cold_start_benchmark.py --token SESSION_TOKEN [--runs 5] [--port 8765] [--max-ms 4000]
+
+Exits 1 when the median exceeds --max-ms, so it can gate CI against regressions.
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).parent
+
+
+def boot_once(port: int, token: str, timeout: float) -> tuple:
+    """Start a worker, poll /api/books until it returns 200. Returns (seconds, startup report)."""
+    started = time.perf_counter()
+    worker = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "server:app", "--host", "127.0.0.1", "--port", str(port)],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    base_url = f"http://127.0.0.1:{port}"
+    try:
+        with httpx.Client(timeout=2.0) as http:
+            while time.perf_counter() - started < timeout:
+                if worker.poll() is not None:
+                    raise RuntimeError(f"Worker exited with code {worker.returncode}")
+                try:
+                    response = http.get(f"{base_url}/api/books", headers={"Authorization": f"Bearer {token}"})
+                except httpx.TransportError:
+                    time.sleep(0.02)
+                    continue
+                if response.status_code == 200:
+                    elapsed = time.perf_counter() - started
+                    report = http.get(f"{base_url}/api/health").json().get("startup", {})
+                    return elapsed, report
+                raise RuntimeError(f"/api/books returned {response.status_code}: {response.text[:200]}")
+        raise RuntimeError(f"No 200 from /api/books within {timeout:.0f}s")
+    finally:
+        worker.terminate()
+        try:
+            worker.wait(10)
+        except subprocess.TimeoutExpired:
+            worker.kill()
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Measure worker cold start (time to first 200 on /api/books)")
+    parser.add_argument("--token", required=True, help="session_token of an existing user")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--timeout", type=float, default=60.0, help="seconds to wait for each boot")
+    parser.add_argument("--max-ms", type=float, default=None, help="fail if the median exceeds this")
+    args = parser.parse_args()
+
+    print("\n" + "="*50)
+    print(f"COLD START BENCHMARK ({args.runs} runs)")
+    print("="*50)
+
+    timings, report = [], {}
+    for run in range(args.runs):
+        try:
+            elapsed, report = boot_once(args.port, args.token, args.timeout)
+        except RuntimeError as e:
+            print(f"❌ Run {run + 1} failed - {e}")
+            return 1
+        timings.append(elapsed * 1000)
+        print(f"   run {run + 1}: first 200 after {timings[-1]:8.1f} ms (worker ready {report.get('ready_ms')} ms)")
+
+    median = statistics.median(timings)
+    print(f"\n📊 time-to-first-200: median {median:.1f} ms, min {min(timings):.1f} ms, max {max(timings):.1f} ms")
+
+    print("\n   Startup phases (last run):")
+    for phase, ms in sorted(report.get("phases_ms", {}).items(), key=lambda p: p[1], reverse=True):
+        print(f"   {phase:<32} {ms:8.1f} ms")
+    for module, ms in report.get("lazy_imports_ms", {}).items():
+        print(f"   ⚠️  {module} was imported during boot/first request ({ms:.1f} ms)")
+
+    if args.max_ms is not None and median > args.max_ms:
+        print(f"❌ Regression: median {median:.1f} ms exceeds --max-ms {args.max_ms:.0f}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Dashboard Load Benchmark for Immersive Reading Sessions
+Compares the single /api/dashboard call against the legacy
+parallel /books + /sessions + /streak pattern
+"""
+
+import argparse
+import statistics
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+
+class DashboardBenchmark:
+    def __init__(self, base_url, session_token, iterations=30, warmup=3):
+        self.base_url = base_url.rstrip("/")
+        self.iterations = iterations
+        self.warmup = warmup
+        self.http = requests.Session()
+        self.http.headers["Authorization"] = f"Bearer {session_token}"
+        # Browsers run the three legacy calls in parallel — mirror that
+        self.pool = ThreadPoolExecutor(max_workers=3)
+
+    def _get(self, endpoint):
+        response = self.http.get(f"{self.base_url}/api/{endpoint}", timeout=15)
+        response.raise_for_status()
+        return len(response.content)
+
+    def load_legacy(self):
+        """Three parallel calls, like Dashboard.js used to make"""
+        return sum(self.pool.map(self._get, ["books", "sessions", "streak"]))
+
+    def load_dashboard(self):
+        """One aggregated call"""
+        return self._get("dashboard")
+
+    def measure(self, name, load):
+        for _ in range(self.warmup):
+            load()
+
+        timings, payload = [], 0
+        for _ in range(self.iterations):
+            started = time.perf_counter()
+            payload = load()
+            timings.append((time.perf_counter() - started) * 1000)
+
+        timings.sort()
+        result = {
+            "name": name,
+            "p50": statistics.median(timings),
+            "p95": timings[min(len(timings) - 1, int(len(timings) * 0.95))],
+            "mean": statistics.mean(timings),
+            "bytes": payload,
+        }
+        print(f"   {name:<28} p50 {result['p50']:8.1f} ms   p95 {result['p95']:8.1f} ms   "
+              f"mean {result['mean']:8.1f} ms   {result['bytes']} bytes")
+        return result
+
+    def run(self):
+        print("\n" + "="*50)
+        print(f"DASHBOARD BENCHMARK ({self.iterations} iterations)")
+        print("="*50)
+        print(f"   URL: {self.base_url}")
+
+        try:
+            legacy = self.measure("/books+/sessions+/streak", self.load_legacy)
+            combined = self.measure("/dashboard", self.load_dashboard)
+        except requests.RequestException as e:
+            print(f"❌ Failed - Error: {str(e)}")
+            return 1
+        finally:
+            self.pool.shutdown()
+
+        print(f"\n📊 p50 speedup: {legacy['p50'] / combined['p50']:.2f}x "
+              f"({legacy['p50'] - combined['p50']:.1f} ms saved per dashboard load)")
+        return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark /api/dashboard against the three-call pattern")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--token", required=True, help="session_token of a user with some books and sessions")
+    parser.add_argument("--iterations", type=int, default=30)
+    args = parser.parse_args()
+
+    return DashboardBenchmark(args.base_url, args.token, args.iterations).run()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+Maintenance Commands
+Run one-off data jobs against the configured MongoDB (same .env as server.py)
+
+Usage:
+    python manage.py release
+    python manage.py migrate [--status]
+    python manage.py backfill-daily-activity [--user USER_ID]
+    python manage.py rebuild-user-stats [--user USER_ID]
+"""
+
+import argparse
+import asyncio
+import logging
+import sys
+import time
+
+from server import db, client
+from migrations import (
+    INDEXES, SCHEMA_VERSION, backfill_daily_activity, ensure_indexes, get_schema_version, indexes_current, migrate,
+    pending_indexes, rebuild_user_stats,
+)
+
+logger = logging.getLogger(__name__)
+
+
+async def migrate_command(status_only: bool = False) -> int:
+    current = await get_schema_version(db)
+    logger.info(f"📐 Schema version: {current} (code expects {SCHEMA_VERSION})")
+    if status_only:
+        return 0 if current >= SCHEMA_VERSION else 2
+    try:
+        applied = await migrate(db)
+    except Exception as e:
+        # Progress is saved per migration, so a rerun resumes where this one stopped
+        logger.error(f"❌ Migration failed: {e}")
+        return 1
+    if not applied:
+        logger.info("✅ Schema is current — nothing to apply.")
+    return 0
+
+
+async def release_command() -> int:
+    """
+    Release-phase schema work: pending migrations, then pending index builds (concurrently).
+    Exits non-zero on failure so the deploy stops before new workers start.
+    """
+    started = time.perf_counter()
+    rc = await migrate_command()
+    if rc:
+        return rc
+
+    if await indexes_current(db):
+        logger.info(f"✅ Indexes current ({len(INDEXES)} defined) — nothing to build.")
+    else:
+        pending = await pending_indexes(db)
+        logger.info(f"▶ Building {len(pending)} of {len(INDEXES)} indexes")
+        try:
+            built = await ensure_indexes(db)
+        except RuntimeError as e:
+            logger.error(f"❌ {e}")
+            return 1
+        slowest = max((elapsed for _, elapsed in built), default=0.0)
+        logger.info(f"✅ Indexes ensured: {len(built)} built, slowest {slowest:.2f}s.")
+
+    logger.info(f"🚀 Release tasks finished in {time.perf_counter() - started:.2f}s.")
+    return 0
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Immersive backend maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("release", help="Apply pending migrations and build pending indexes (deploy release phase)")
+
+    migrate_parser = commands.add_parser("migrate", help="Apply pending schema migrations (resumable)")
+    migrate_parser.add_argument("--status", action="store_true", help="Only report the schema version")
+
+    backfill = commands.add_parser("backfill-daily-activity", help="Rebuild calendar rollups from sessions")
+    backfill.add_argument("--user", dest="user_id", help="Only backfill this user_id")
+
+    rebuild_stats = commands.add_parser("rebuild-user-stats", help="Recompute analytics totals from books and sessions")
+    rebuild_stats.add_argument("--user", dest="user_id", help="Only rebuild this user_id")
+
+    args = parser.parse_args(argv)
+
+    if db is None:
+        logger.error("❌ MONGO_URL is not configured.")
+        return 1
+
+    exit_code = 0
+    try:
+        if args.command == "release":
+            exit_code = asyncio.run(release_command())
+        elif args.command == "migrate":
+            exit_code = asyncio.run(migrate_command(args.status))
+        elif args.command == "backfill-daily-activity":
+            rows = asyncio.run(backfill_daily_activity(db, args.user_id))
+            logger.info(f"✅ daily_activity backfilled: {rows} day rows.")
+        elif args.command == "rebuild-user-stats":
+            users = asyncio.run(rebuild_user_stats(db, args.user_id))
+            logger.info(f"✅ user_stats rebuilt for {users} users.")
+    finally:
+        client.close()
+    return exit_code
+
+
+if __name__ == "__main__":
+    sys.exit(main())
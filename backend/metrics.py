@@ -0,0 +1,173 @@
+"""
+Prometheus Metrics
+Per-route request counts, latency histograms and in-flight gauges, plus Gemini
+time-to-first-token and token usage, aggregated across uvicorn workers
+"""
+
+import logging
+import os
+import tempfile
+import time
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+# Multiprocess mode: every worker writes its samples to mmap files in a shared directory
+# and /metrics sums them, so any worker can answer for the whole process group. Workers of
+# one `uvicorn --workers N` share a parent, which keys the default directory. The variable
+# has to be set before prometheus_client is imported.
+if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    os.environ["PROMETHEUS_MULTIPROC_DIR"] = str(Path(tempfile.gettempdir()) / f"immersive-metrics-{os.getppid()}")
+MULTIPROC_DIR = Path(os.environ["PROMETHEUS_MULTIPROC_DIR"])
+
+try:
+    from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, Counter, Gauge, Histogram, generate_latest
+    from prometheus_client import multiprocess
+except ImportError:
+    multiprocess = None
+    logger.warning("⚠️  prometheus-client not installed — /metrics is disabled.")
+
+METRICS_ENABLED = multiprocess is not None and os.getenv('METRICS_ENABLED', 'true').strip().lower() in ('1', 'true', 'yes')
+
+GEMINI_TTFT_BUCKETS = (0.25, 0.5, 1.0, 2.0, 3.0, 5.0, 8.0, 13.0, 20.0, 30.0)
+
+if METRICS_ENABLED:
+    MULTIPROC_DIR.mkdir(parents=True, exist_ok=True)
+
+    HTTP_REQUESTS = Counter(
+        "http_requests_total", "HTTP requests by route template and status",
+        ["method", "route", "status"],
+    )
+    HTTP_LATENCY = Histogram(
+        "http_request_duration_seconds", "Time until the response body finished sending",
+        ["method", "route"],
+    )
+    # By method only: the route template is only known once routing has run
+    HTTP_IN_FLIGHT = Gauge(
+        "http_requests_in_flight", "Requests currently being handled",
+        ["method"], multiprocess_mode="livesum",
+    )
+    GEMINI_TTFT = Histogram(
+        "gemini_time_to_first_token_seconds", "Chat request to first streamed token (incl. retries)",
+        ["model"], buckets=GEMINI_TTFT_BUCKETS,
+    )
+    GEMINI_TOKENS = Counter(
+        "gemini_tokens_total", "Gemini token usage",
+        ["model", "type"],
+    )
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def clear_dead_workers():
+    """Drop live-gauge files left by workers that died without a clean shutdown."""
+    if not METRICS_ENABLED:
+        return
+    try:
+        for path in MULTIPROC_DIR.glob("gauge_live*_*.db"):
+            pid = path.stem.rsplit("_", 1)[-1]
+            if pid.isdigit() and not _pid_alive(int(pid)):
+                multiprocess.mark_process_dead(int(pid), str(MULTIPROC_DIR))
+    except Exception as e:
+        logger.warning(f"Clearing dead worker metrics failed: {e}")
+
+
+def mark_worker_dead():
+    """Call on shutdown so this worker's in-flight gauges stop counting."""
+    if not METRICS_ENABLED:
+        return
+    try:
+        multiprocess.mark_process_dead(os.getpid(), str(MULTIPROC_DIR))
+    except Exception as e:
+        logger.warning(f"Marking worker metrics dead failed: {e}")
+
+
+def render_metrics() -> tuple:
+    """(body, content type) for every worker's samples in Prometheus text format."""
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry, path=str(MULTIPROC_DIR))
+    return generate_latest(registry), CONTENT_TYPE_LATEST
+
+
+def route_template(scope) -> str:
+    """
+    Path template of the route that handled this request (e.g. /api/books/{book_id}),
+    read from the scope after dispatch. Raw paths would give one series per id;
+    unrouted requests share one label.
+    """
+    route = scope.get("route")
+    template = getattr(route, "path_format", None) or getattr(route, "path", None)
+    return template if isinstance(template, str) else "unmatched"
+
+
+class PrometheusMiddleware:
+    """
+    Pure ASGI middleware (no BaseHTTPMiddleware) so streamed responses pass through
+    untouched; latency is measured until the last body chunk, which for SSE chat is
+    the whole stream. Instrumentation errors are logged and swallowed — metrics must
+    never fail a request.
+    """
+
+    def __init__(self, app, skip_paths=("/metrics",)):
+        self.app = app
+        self.skip_paths = set(skip_paths)
+
+    async def __call__(self, scope, receive, send):
+        if not METRICS_ENABLED or scope["type"] != "http" or scope["path"] in self.skip_paths:
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        status = 500
+        started = time.perf_counter()
+        in_flight = None
+        try:
+            in_flight = HTTP_IN_FLIGHT.labels(method)
+            in_flight.inc()
+        except Exception as e:
+            logger.debug(f"Metrics in-flight update failed: {e}")
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            try:
+                if in_flight is not None:
+                    in_flight.dec()
+                route = route_template(scope)
+                HTTP_REQUESTS.labels(method, route, str(status)).inc()
+                HTTP_LATENCY.labels(method, route).observe(time.perf_counter() - started)
+            except Exception as e:
+                logger.debug(f"Metrics recording failed: {e}")
+
+
+def record_gemini_ttft(model: str, seconds: float):
+    if not METRICS_ENABLED:
+        return
+    try:
+        GEMINI_TTFT.labels(model).observe(seconds)
+    except Exception as e:
+        logger.debug(f"Metrics recording failed: {e}")
+
+
+def record_gemini_usage(model: str, usage_metadata):
+    if not METRICS_ENABLED or not usage_metadata:
+        return
+    try:
+        GEMINI_TOKENS.labels(model, "input").inc(usage_metadata.prompt_token_count or 0)
+        GEMINI_TOKENS.labels(model, "output").inc(usage_metadata.candidates_token_count or 0)
+    except Exception as e:
+        logger.debug(f"Metrics recording failed: {e}")
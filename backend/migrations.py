@@ -0,0 +1,379 @@
+"""
+Schema Migrations
+Versioned, resumable data migrations and index definitions tracked in the schema_meta collection
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+
+from pymongo import ASCENDING, DESCENDING, TEXT, ReplaceOne
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_META = "schema_meta"
+SCHEMA_DOC_ID = "schema"
+INDEXES_DOC_ID = "indexes"
+BATCH_SIZE = 1000
+
+# Timestamp fields older code paths may have written as ISO strings
+DATETIME_FIELDS = {
+    "users": ["created_at"],
+    "user_sessions": ["expires_at", "created_at"],
+    "books": ["created_at"],
+    "sessions": ["started_at", "ended_at"],
+    "notes": ["created_at"],
+}
+
+
+async def normalize_datetimes(db, state: dict, save_state) -> int:
+    """
+    Rewrite ISO-string timestamps as native BSON dates.
+
+    Works in _id-ordered batches; the conversion itself runs server-side ($toDate in a
+    pipeline update). After every batch the position is checkpointed, so an interrupted
+    run resumes from the last converted _id. Returns the number of documents modified.
+    """
+    modified = 0
+    done = list(state.get("done", []))
+    for name, fields in DATETIME_FIELDS.items():
+        if name in done:
+            continue
+        collection = db[name]
+        string_filter = {"$or": [{field: {"$type": "string"}} for field in fields]}
+        converted = {
+            field: {"$cond": [
+                {"$eq": [{"$type": f"${field}"}, "string"]},
+                {"$toDate": f"${field}"},
+                f"${field}",
+            ]}
+            for field in fields
+        }
+        last_id = state.get("last_id") if state.get("collection") == name else None
+
+        while True:
+            query = dict(string_filter)
+            if last_id is not None:
+                query["_id"] = {"$gt": last_id}
+            batch = await collection.find(query, {"_id": 1}).sort("_id", 1).limit(BATCH_SIZE).to_list(BATCH_SIZE)
+            if not batch:
+                break
+            ids = [doc["_id"] for doc in batch]
+            result = await collection.update_many({"_id": {"$in": ids}}, [{"$set": converted}])
+            modified += result.modified_count
+            last_id = ids[-1]
+            await save_state({"done": done, "collection": name, "last_id": last_id})
+
+        done.append(name)
+        await save_state({"done": done})
+        logger.info(f"   {name}: timestamps normalized")
+    return modified
+
+
+def daily_activity_pipeline(match: dict) -> list:
+    """
+    Aggregation that groups finished sessions into per-user, per-day
+    {sessions, minutes} rows. Mirrors server.calendar_minutes() server-side.
+    """
+    started = "$started_at"
+    ended = "$ended_at"
+    elapsed_minutes = {"$round": [{"$divide": [{"$subtract": [ended, started]}, 60000]}, 0]}
+    return [
+        {"$match": match},
+        {"$project": {
+            "_id": 0,
+            "user_id": 1,
+            "date": {"$dateToString": {"format": "%Y-%m-%d", "date": started}},
+            "minutes": {"$max": [1, {"$min": [
+                {"$ifNull": ["$actual_minutes", elapsed_minutes]},
+                {"$ifNull": ["$duration_minutes", 30]},
+            ]}]},
+        }},
+        {"$group": {
+            "_id": {"user_id": "$user_id", "date": "$date"},
+            "sessions": {"$sum": 1},
+            "minutes": {"$sum": "$minutes"},
+        }},
+        {"$project": {
+            "_id": 0,
+            "user_id": "$_id.user_id",
+            "date": "$_id.date",
+            "sessions": 1,
+            "minutes": 1,
+        }},
+    ]
+
+
+async def backfill_daily_activity(db, user_id: str = None) -> int:
+    """
+    Rebuild daily_activity rollups from finished sessions.
+
+    Runs entirely server-side ($group + $merge) and replaces each (user_id, date)
+    row, so it is safe to re-run. Returns the number of rollup rows for the scope.
+    """
+    match = {"ended_at": {"$ne": None}}
+    if user_id:
+        match["user_id"] = user_id
+
+    # $merge on (user_id, date) requires the unique index to exist
+    await db.daily_activity.create_index([("user_id", ASCENDING), ("date", ASCENDING)], unique=True)
+
+    pipeline = daily_activity_pipeline(match) + [
+        {"$merge": {
+            "into": "daily_activity",
+            "on": ["user_id", "date"],
+            "whenMatched": "replace",
+            "whenNotMatched": "insert",
+        }}
+    ]
+    await db.sessions.aggregate(pipeline).to_list(None)
+
+    return await db.daily_activity.count_documents({"user_id": user_id} if user_id else {})
+
+
+async def backfill_daily_activity_migration(db, state: dict, save_state) -> int:
+    # One idempotent $merge pass — nothing to checkpoint
+    return await backfill_daily_activity(db)
+
+
+def stats_key(value: str) -> str:
+    """Make a status/genre usable as a field name ('.' and a leading '$' are reserved)"""
+    value = value.replace(".", "\uff0e")
+    return "\uff04" + value[1:] if value.startswith("$") else value
+
+
+async def rebuild_user_stats(db, user_id: str = None) -> int:
+    """
+    Recompute user_stats from books and finished sessions in one aggregation pass.
+
+    Books are grouped per (user, status, genre) and session totals per user, joined
+    with $unionWith; the few resulting rows are folded here so keys get the same
+    fallbacks/escaping as the incremental updates. Documents are replaced, so it is
+    safe to re-run. Rebuilt documents carry rebuilt_at; ones created only by deltas
+    don't, which tells readers they may be partial. Returns the number written.
+    """
+    match = {"user_id": user_id} if user_id else {}
+    pipeline = [
+        {"$match": match},
+        {"$group": {
+            "_id": {"user_id": "$user_id", "status": "$status", "genre": "$genre"},
+            "books": {"$sum": 1},
+            "minutes": {"$sum": {"$ifNull": ["$total_minutes", 0]}},
+        }},
+        {"$unionWith": {"coll": "sessions", "pipeline": [
+            {"$match": {**match, "ended_at": {"$ne": None}}},
+            {"$group": {
+                "_id": {"user_id": "$user_id"},
+                "sessions": {"$sum": 1},
+                "session_minutes": {"$sum": {"$ifNull": ["$actual_minutes", 0]}},
+            }},
+        ]}},
+    ]
+
+    stats = defaultdict(lambda: {
+        "total_minutes": 0, "total_sessions": 0, "books_total": 0,
+        "books_by_status": defaultdict(int), "minutes_by_genre": defaultdict(int),
+    })
+    async for row in db.books.aggregate(pipeline):
+        user_stats = stats[row["_id"]["user_id"]]
+        if "sessions" in row:
+            user_stats["total_sessions"] += row["sessions"]
+            user_stats["total_minutes"] += row["session_minutes"]
+            continue
+        user_stats["books_total"] += row["books"]
+        user_stats["books_by_status"][stats_key(row["_id"].get("status") or "want_to_read")] += row["books"]
+        user_stats["minutes_by_genre"][stats_key(row["_id"].get("genre") or "General")] += row["minutes"]
+    if user_id:
+        stats[user_id]  # a user with no data still gets a (zeroed) complete document
+
+    now = datetime.now(timezone.utc)
+    writes = [
+        ReplaceOne({"_id": uid}, {**doc, "books_by_status": dict(doc["books_by_status"]),
+                                  "minutes_by_genre": dict(doc["minutes_by_genre"]),
+                                  "updated_at": now, "rebuilt_at": now}, upsert=True)
+        for uid, doc in stats.items()
+    ]
+    for start in range(0, len(writes), 1000):
+        await db.user_stats.bulk_write(writes[start:start + 1000], ordered=False)
+    if not user_id:
+        # Users left with no books or sessions shouldn't keep stale totals
+        await db.user_stats.delete_many({"_id": {"$nin": list(stats)}})
+
+    return len(writes)
+
+
+async def rebuild_user_stats_migration(db, state: dict, save_state) -> int:
+    # Seeds user_stats for data that predates the incremental updates
+    return await rebuild_user_stats(db)
+
+
+class Migration:
+    def __init__(self, version: int, name: str, apply):
+        self.version = version
+        self.name = name
+        self.apply = apply
+
+
+MIGRATIONS = [
+    Migration(1, "normalize_datetimes", normalize_datetimes),
+    Migration(2, "backfill_daily_activity", backfill_daily_activity_migration),
+    Migration(3, "rebuild_user_stats", rebuild_user_stats_migration),
+]
+
+SCHEMA_VERSION = MIGRATIONS[-1].version
+# Calendar reads rollups only from this version on
+DAILY_ACTIVITY_SCHEMA_VERSION = 2
+
+
+async def get_schema_version(db) -> int:
+    doc = await db[SCHEMA_META].find_one({"_id": SCHEMA_DOC_ID})
+    return doc.get("version", 0) if doc else 0
+
+
+async def migrate(db) -> list:
+    """Apply every pending migration in order. Returns the names of those applied."""
+    meta = db[SCHEMA_META]
+    current = await get_schema_version(db)
+    applied = []
+
+    for migration in MIGRATIONS:
+        if migration.version <= current:
+            continue
+
+        progress_id = f"migration:{migration.version}"
+        progress = await meta.find_one({"_id": progress_id}) or {}
+        if progress.get("state"):
+            logger.info(f"↻ Resuming migration {migration.version} ({migration.name})")
+        else:
+            logger.info(f"▶ Applying migration {migration.version} ({migration.name})")
+
+        async def save_state(state, progress_id=progress_id, migration=migration):
+            await meta.update_one(
+                {"_id": progress_id},
+                {"$set": {"name": migration.name, "state": state, "updated_at": datetime.now(timezone.utc)}},
+                upsert=True
+            )
+
+        started = time.perf_counter()
+        modified = await migration.apply(db, progress.get("state", {}), save_state)
+        elapsed = time.perf_counter() - started
+
+        await meta.update_one(
+            {"_id": progress_id},
+            {"$set": {"status": "applied", "modified": modified, "applied_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+        await meta.update_one(
+            {"_id": SCHEMA_DOC_ID},
+            {"$set": {"version": migration.version, "updated_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+        logger.info(f"✅ Migration {migration.version} ({migration.name}): {modified} documents in {elapsed:.1f}s")
+        applied.append(migration.name)
+
+    return applied
+
+
+# ==================== INDEXES ====================
+
+class Index:
+    def __init__(self, collection: str, keys: list, **options):
+        self.collection = collection
+        self.keys = keys
+        self.options = options
+
+    @property
+    def name(self) -> str:
+        # Same default name pymongo/Mongo generate, so existing indexes are recognised
+        return self.options.get("name") or "_".join(f"{field}_{direction}" for field, direction in self.keys)
+
+    def spec(self) -> dict:
+        return {"collection": self.collection, "keys": self.keys, "options": self.options}
+
+
+INDEXES = [
+    Index("books", [("user_id", ASCENDING)]),
+    Index("books", [("user_id", ASCENDING), ("status", ASCENDING)]),
+    Index("sessions", [("user_id", ASCENDING), ("started_at", DESCENDING)]),
+    Index("streaks", [("user_id", ASCENDING)]),
+    Index("notes", [("book_id", ASCENDING), ("created_at", DESCENDING)]),
+    # Keyset pagination: (user_id, timestamp, id) serves both the range and the tie-break sort
+    Index("books", [("user_id", ASCENDING), ("created_at", DESCENDING), ("book_id", DESCENDING)]),
+    Index("sessions", [("user_id", ASCENDING), ("started_at", DESCENDING), ("session_id", DESCENDING)]),
+    Index("notes", [("user_id", ASCENDING), ("created_at", DESCENDING), ("note_id", DESCENDING)]),
+    # Notes search: user_id prefix keeps each text lookup inside one user's notes
+    Index("notes", [("user_id", ASCENDING), ("content", TEXT)], name="notes_user_text"),
+    # PERF: Critical index — every API request queries user_sessions by token
+    Index("user_sessions", [("session_token", ASCENDING)], unique=True),
+    # Mongo purges sessions once expires_at passes, keeping the token index to live sessions
+    Index("user_sessions", [("expires_at", ASCENDING)], expireAfterSeconds=0),
+    # Per-user session cap (newest first)
+    Index("user_sessions", [("user_id", ASCENDING), ("created_at", DESCENDING)]),
+    Index("daily_activity", [("user_id", ASCENDING), ("date", ASCENDING)], unique=True),
+    Index("import_jobs", [("job_id", ASCENDING)], unique=True),
+    Index("rate_limits", [("expires_at", ASCENDING)], expireAfterSeconds=0),
+    # Book search L2 cache — Mongo drops entries once expires_at passes
+    Index("book_search_cache", [("expires_at", ASCENDING)], expireAfterSeconds=0),
+]
+
+# Version marker for the index set: changes whenever a definition is added or edited
+INDEXES_FINGERPRINT = hashlib.sha1(
+    json.dumps([index.spec() for index in INDEXES], sort_keys=True).encode()
+).hexdigest()[:16]
+
+
+async def indexes_current(db) -> bool:
+    """True when the stored marker matches INDEXES — one point read, no listIndexes calls."""
+    doc = await db[SCHEMA_META].find_one({"_id": INDEXES_DOC_ID})
+    return bool(doc) and doc.get("fingerprint") == INDEXES_FINGERPRINT
+
+
+async def pending_indexes(db) -> list:
+    """Index definitions that don't exist yet (matched by name)."""
+    collections = sorted({index.collection for index in INDEXES})
+
+    async def existing(name):
+        return {info["name"] async for info in db[name].list_indexes()}
+
+    existing_names = dict(zip(collections, await asyncio.gather(*(existing(name) for name in collections))))
+    return [index for index in INDEXES if index.name not in existing_names[index.collection]]
+
+
+async def ensure_indexes(db) -> list:
+    """
+    Build every pending index concurrently and record the marker once all succeed.
+
+    Returns [(index, seconds)] for the builds that ran. Raises RuntimeError naming each
+    failed index; the marker is left untouched so the next run retries.
+    """
+    pending = await pending_indexes(db)
+
+    async def build(index):
+        started = time.perf_counter()
+        await db[index.collection].create_index(index.keys, **index.options)
+        elapsed = time.perf_counter() - started
+        logger.info(f"   {index.collection}.{index.name}: built in {elapsed:.2f}s")
+        return index, elapsed
+
+    results = await asyncio.gather(*(build(index) for index in pending), return_exceptions=True)
+    failures = [
+        f"{index.collection}.{index.name}: {result}"
+        for index, result in zip(pending, results) if isinstance(result, BaseException)
+    ]
+    if failures:
+        raise RuntimeError("Index build failed — " + "; ".join(failures))
+
+    await db[SCHEMA_META].update_one(
+        {"_id": INDEXES_DOC_ID},
+        {"$set": {
+            "fingerprint": INDEXES_FINGERPRINT,
+            "names": [f"{index.collection}.{index.name}" for index in INDEXES],
+            "updated_at": datetime.now(timezone.utc),
+        }},
+        upsert=True
+    )
+    return results
@@ -0,0 +1,138 @@
+"""
+Serialization Benchmark
+Measures per-1k-document serialization cost of the list routes: FastAPI's
+response_model paths (current: validate + Pydantic dump_json; older releases:
+validate + stdlib json) against the orjson / MessagePack fast path
+
+Usage:
+    python serialization_benchmark.py [--docs 1000] [--repeat 20]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import List
+
+from pydantic import TypeAdapter
+
+from server import Book, Session, Note, BOOK_DEFAULTS, SESSION_DEFAULTS, NOTE_DEFAULTS, shape_documents, _msgpack_default
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+
+def make_books(n: int) -> list:
+    now = datetime.now(timezone.utc).replace(tzinfo=None)  # Mongo returns naive UTC
+    return [{
+        "book_id": f"book_{uuid.uuid4().hex[:12]}",
+        "user_id": "user_benchmark",
+        "title": f"Benchmark Title {i}",
+        "author": "Some Author",
+        "genre": "Fiction",
+        "cover_url": "https://books.google.com/books/content?id=abc&printsec=frontcover&img=1",
+        "status": "currently_reading",
+        "total_minutes": i * 3,
+        "total_sessions": i,
+        "description": "A long-ish description of the book. " * 8,
+        "page_count": 320,
+        "google_books_id": "abc123",
+        "created_at": now - timedelta(minutes=i),
+    } for i in range(n)]
+
+
+def make_sessions(n: int) -> list:
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return [{
+        "session_id": f"session_{uuid.uuid4().hex[:12]}",
+        "user_id": "user_benchmark",
+        "book_id": "book_benchmark",
+        "mood": "Focus",
+        "sound_theme": "rain",
+        "duration_minutes": 30,
+        "actual_minutes": 27,
+        "started_at": now - timedelta(hours=i),
+        "ended_at": now - timedelta(hours=i) + timedelta(minutes=27),
+        "notes_count": 2,
+    } for i in range(n)]
+
+
+def make_notes(n: int) -> list:
+    now = datetime.now(timezone.utc).replace(tzinfo=None)
+    return [{
+        "note_id": f"note_{uuid.uuid4().hex[:12]}",
+        "session_id": "session_benchmark",
+        "book_id": "book_benchmark",
+        "user_id": "user_benchmark",
+        "content": "A thought jotted down mid-chapter about the narrator. " * 3,
+        "created_at": now - timedelta(minutes=i),
+    } for i in range(n)]
+
+
+def time_per_1k(fn, docs: list, repeat: int) -> tuple:
+    """Median ms per 1,000 documents, plus payload size in bytes."""
+    payload = fn(docs)
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn(docs)
+        timings.append((time.perf_counter() - started) * 1000 * 1000 / len(docs))
+    return statistics.median(timings), len(payload)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark list-route serialization")
+    parser.add_argument("--docs", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    datasets = [
+        ("books", Book, BOOK_DEFAULTS, make_books(args.docs)),
+        ("sessions", Session, SESSION_DEFAULTS, make_sessions(args.docs)),
+        ("notes", Note, NOTE_DEFAULTS, make_notes(args.docs)),
+    ]
+
+    print(f"Serialization cost per 1,000 documents (median of {args.repeat} runs, {args.docs} docs)\n")
+    for name, model, defaults, docs in datasets:
+        adapter = TypeAdapter(List[model])
+
+        def response_model_path(d):
+            # Current FastAPI for response_model=List[Model]: validate, then Pydantic serializes to bytes
+            return adapter.dump_json(adapter.validate_python(d))
+
+        def legacy_response_model_path(d):
+            # Older FastAPI: validate, dump to JSON-able, json.dumps
+            validated = adapter.validate_python(d)
+            return json.dumps(adapter.dump_python(validated, mode="json"), ensure_ascii=False,
+                              allow_nan=False, separators=(",", ":")).encode("utf-8")
+
+        paths = [
+            ("response_model (pydantic)", response_model_path),
+            ("response_model + json", legacy_response_model_path),
+        ]
+        if orjson is not None:
+            paths.append(("orjson", lambda d: orjson.dumps(shape_documents(d, defaults))))
+        if msgpack is not None:
+            paths.append(("msgpack", lambda d: msgpack.packb(shape_documents(d, defaults), default=_msgpack_default, use_bin_type=True)))
+
+        baseline = None
+        for label, fn in paths:
+            ms, size = time_per_1k(fn, docs, args.repeat)
+            baseline = baseline or ms
+            print(f"  {name:<9} {label:<26} {ms:8.2f} ms/1k   {size / 1024:8.1f} KiB   {baseline / ms:5.1f}x")
+        print()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
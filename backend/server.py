@@ -1,17 +1,27 @@
+# Imported first so every boot phase below, imports included, can be timed
+from startup_profile import boot_timer, lazy_import, lazy_observe
 from fastapi import FastAPI, UploadFile, File, Form, Depends, HTTPException, Header, APIRouter, Cookie, Response, Request
 from fastapi.responses import JSONResponse, FileResponse, StreamingResponse
-from dotenv import load_dotenv
+from fastapi.encoders import jsonable_encoder
+from dotenv import load_dotenv, dotenv_values
 from fastapi.middleware.cors import CORSMiddleware
 from starlette.middleware.gzip import GZipMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import BulkWriteError
+boot_timer.mark("import fastapi/motor/pymongo")
 import os
 import logging
 import asyncio
 from pathlib import Path
-from pydantic import BaseModel, ConfigDict
-from typing import List, Optional, Dict, Any
+from pydantic import BaseModel, ConfigDict, ValidationError
+from typing import List, Optional, Dict, Any, Union
+boot_timer.mark("import pydantic")
 import uuid
-from datetime import datetime, timezone, timedelta
+import base64
+import functools
+import hashlib
+from datetime import date, datetime, timezone, timedelta
 import sys
 import traceback
 
@@ -25,14 +35,22 @@ logger = logging.getLogger(__name__)
 logger.info("🚀 STARTING BACKEND INITIALIZATION...")
 import httpx
 import json
-from google import genai
-from google.genai import types
-from collections import defaultdict
+from collections import Counter, defaultdict, OrderedDict
 import time
 import re
-from langfuse import observe, get_client, Langfuse
+import queue
+import threading
+import csv
+import io
+import itertools
+import tempfile
+# PERF: google.genai (~1s) and langfuse are imported on first chat use, not at boot —
+# most workers only serve CRUD. See lazy_import / lazy_observe in startup_profile.py.
+boot_timer.mark("import stdlib/httpx")
 
 ROOT_DIR = Path(__file__).parent
+# Set by the deployment (not copied from .env), so it keeps precedence over later .env edits
+PROCESS_GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
 load_dotenv(ROOT_DIR / '.env')
 # Langfuse v3 - Disable media upload to prevent terminal warnings
 os.environ["LANGFUSE_S3_MEDIA_UPLOAD_ENABLED"] = "false"
@@ -40,15 +58,29 @@ os.environ["LANGFUSE_MEDIA_ENABLED"] = "false"
 os.environ["LANGFUSE_OBSERVE_DECORATOR_IO_CAPTURE_ENABLED"] = "true"
 # Explicitly disable media capture globally for the client
 os.environ["LANGFUSE_MEDIA_UPLOAD_ENABLED"] = "false"
+# Fraction of @observe traces exported (chat_with_book, fetch_book_context). Defaults to 1 in 5;
+# set LANGFUSE_SAMPLE_RATE=1.0 to trace every chat while debugging. The SDK reads it from os.environ.
+LANGFUSE_SAMPLE_RATE = min(1.0, max(0.0, float(os.getenv('LANGFUSE_SAMPLE_RATE', '0.2'))))
+os.environ["LANGFUSE_SAMPLE_RATE"] = str(LANGFUSE_SAMPLE_RATE)
+
+from migrations import (
+    DAILY_ACTIVITY_SCHEMA_VERSION, SCHEMA_VERSION, daily_activity_pipeline, ensure_indexes, get_schema_version,
+    indexes_current, rebuild_user_stats, stats_key,
+)
+from metrics import (
+    METRICS_ENABLED, PrometheusMiddleware, clear_dead_workers, mark_worker_dead, render_metrics,
+    record_gemini_ttft, record_gemini_usage,
+)
+boot_timer.mark("load .env + migrations/metrics")
 
-# Import Google OAuth handler
-try:
-    from auth_google import google_oauth
-    GOOGLE_OAUTH_ENABLED = bool(os.getenv('GOOGLE_CLIENT_ID'))
-except ImportError:
-    GOOGLE_OAUTH_ENABLED = False
+# Google OAuth handler — auth_google (google.auth transport stack) is imported on first login
+GOOGLE_OAUTH_ENABLED = bool(os.getenv('GOOGLE_CLIENT_ID'))
+if not GOOGLE_OAUTH_ENABLED:
     print("⚠️  Google OAuth not configured. Using Emergent managed auth only.")
 
+def get_google_oauth():
+    return lazy_import("auth_google").google_oauth
+
 # MongoDB connection - Safe lookup for production deployment
 # Use getenv instead of environ[] to avoid KeyError crashes on startup
 mongo_url = os.getenv('MONGO_URL', '').strip().strip("'").strip('"')
@@ -69,30 +101,260 @@ else:
         logger.error(traceback.format_exc())
         client = None
         db = None
+boot_timer.mark("mongo client")
+
+# ==================== OUTBOUND HTTP ====================
+
+# PERF: One pooled AsyncClient for the app lifetime — keep-alive (and HTTP/2 when `h2`
+# is installed) means search, chat context and login skip a TCP+TLS handshake per call.
+GOOGLE_BOOKS_API_URL = "https://www.googleapis.com/books/v1/volumes"
+EMERGENT_AUTH_URL = "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data"
+
+HTTP_MAX_CONNECTIONS = int(os.getenv('HTTP_MAX_CONNECTIONS', '50'))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv('HTTP_MAX_KEEPALIVE_CONNECTIONS', '20'))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv('HTTP_KEEPALIVE_EXPIRY_SECONDS', '30'))
+HTTP_DEFAULT_TIMEOUT = float(os.getenv('HTTP_DEFAULT_TIMEOUT_SECONDS', '10'))
+HTTP_CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT_SECONDS', '5'))
+HTTP2_ENABLED = os.getenv('HTTP2_ENABLED', 'true').strip().lower() in ('1', 'true', 'yes')
+
+def _parse_host_timeouts(raw: str) -> Dict[str, float]:
+    """Parse HTTP_HOST_TIMEOUTS, e.g. 'www.googleapis.com=8,demobackend.emergentagent.com=10'."""
+    timeouts = {}
+    for entry in raw.split(','):
+        host, _, seconds = entry.strip().partition('=')
+        if not host or not seconds:
+            continue
+        try:
+            timeouts[host.strip()] = float(seconds)
+        except ValueError:
+            logger.warning(f"Ignoring invalid HTTP_HOST_TIMEOUTS entry: {entry!r}")
+    return timeouts
+
+HTTP_HOST_TIMEOUTS = {
+    "www.googleapis.com": 10.0,
+    "demobackend.emergentagent.com": 10.0,
+    **_parse_host_timeouts(os.getenv('HTTP_HOST_TIMEOUTS', '')),
+}
+
+_http_client: Optional[httpx.AsyncClient] = None
+_http_request_counts: Dict[str, int] = defaultdict(int)  # host -> requests sent
+
+def http_timeout_for(url: str) -> httpx.Timeout:
+    """Per-host timeout; connect timeout is capped so a dead host fails fast."""
+    host = httpx.URL(url).host
+    total = HTTP_HOST_TIMEOUTS.get(host, HTTP_DEFAULT_TIMEOUT)
+    return httpx.Timeout(total, connect=min(total, HTTP_CONNECT_TIMEOUT))
+
+async def _count_http_request(request: httpx.Request):
+    _http_request_counts[request.url.host] += 1
+
+def _http2_available() -> bool:
+    if not HTTP2_ENABLED:
+        return False
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        logger.warning("HTTP2_ENABLED is set but 'h2' is not installed — falling back to HTTP/1.1.")
+        return False
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the shared outbound client, creating it on first use."""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = httpx.AsyncClient(
+            http2=_http2_available(),
+            limits=httpx.Limits(
+                max_connections=HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+            ),
+            timeout=httpx.Timeout(HTTP_DEFAULT_TIMEOUT, connect=HTTP_CONNECT_TIMEOUT),
+            headers={"User-Agent": "ImmersiveReadingApp/1.0"},
+            event_hooks={"request": [_count_http_request]},
+        )
+    return _http_client
+
+async def close_http_client():
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+def http_pool_stats() -> dict:
+    """Connection pool snapshot for the shared client (reads httpcore internals defensively)."""
+    stats = {
+        "open": _http_client is not None and not _http_client.is_closed,
+        "http2": False,
+        "max_connections": HTTP_MAX_CONNECTIONS,
+        "max_keepalive_connections": HTTP_MAX_KEEPALIVE_CONNECTIONS,
+        "requests_by_host": dict(_http_request_counts),
+    }
+    if not stats["open"]:
+        return stats
+    try:
+        pool = _http_client._transport._pool
+        connections = list(pool.connections)
+        stats["http2"] = bool(getattr(pool, "_http2", False))
+        stats["connections"] = len(connections)
+        stats["idle_connections"] = sum(1 for c in connections if c.is_idle())
+    except AttributeError:
+        pass
+    return stats
+
+# ==================== TELEMETRY ====================
+
+class TelemetryExporter:
+    """
+    Keeps Langfuse I/O off the request path. Work (e.g. score submissions) goes into a
+    bounded queue — dropped and counted when full — and a daemon thread runs it in
+    batches, flushing the client every flush_interval seconds or when asked to.
+    """
+
+    def __init__(self, max_queue: int, batch_size: int, flush_interval: float):
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue)
+        self._flush_requested = threading.Event()
+        self._stopping = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.enqueued = 0
+        self.dropped = 0
+        self.exported = 0
+        self.failed = 0
+        self.flushes = 0
+
+    def start(self):
+        if self._thread is None or not self._thread.is_alive():
+            self._stopping.clear()
+            self._thread = threading.Thread(target=self._run, name="telemetry-exporter", daemon=True)
+            self._thread.start()
+
+    def stop(self, timeout: float = 5.0):
+        self._stopping.set()
+        self._flush_requested.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+
+    def submit(self, fn, *args, **kwargs) -> bool:
+        """Queue a telemetry call; never blocks. Returns False if it was dropped."""
+        try:
+            self._queue.put_nowait((fn, args, kwargs))
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.enqueued += 1
+        return True
+
+    def request_flush(self):
+        """Ask the background thread to flush soon, instead of flushing inline."""
+        self._flush_requested.set()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._flush_requested.wait(self.flush_interval)
+            self._flush_requested.clear()
+            self._export()
+        self._export()
+
+    def _export(self):
+        while True:
+            batch = []
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            for fn, args, kwargs in batch:
+                try:
+                    fn(*args, **kwargs)
+                    self.exported += 1
+                except Exception as e:
+                    self.failed += 1
+                    logging.error(f"Telemetry export failed: {e}")
+            if len(batch) < self.batch_size:
+                break
+        if "langfuse" not in sys.modules:
+            return  # Nothing traced yet, nothing to flush
+        try:
+            langfuse_client().flush()
+            self.flushes += 1
+        except Exception as e:
+            logging.error(f"Langfuse flush failed: {e}")
+
+    def stats(self) -> dict:
+        return {
+            "queued": self._queue.qsize(),
+            "enqueued": self.enqueued,
+            "dropped": self.dropped,
+            "exported": self.exported,
+            "failed": self.failed,
+            "flushes": self.flushes,
+            "sample_rate": LANGFUSE_SAMPLE_RATE,
+        }
+
+def langfuse_client():
+    """Langfuse client (the SDK is imported on first use)."""
+    return lazy_import("langfuse").get_client()
+
+telemetry_exporter = TelemetryExporter(
+    max_queue=int(os.getenv('TELEMETRY_QUEUE_SIZE', '1000')),
+    batch_size=int(os.getenv('TELEMETRY_BATCH_SIZE', '50')),
+    flush_interval=float(os.getenv('TELEMETRY_FLUSH_INTERVAL_SECONDS', '5')),
+)
+
+# Schema version read at startup (release migrations run before workers boot)
+_schema_version = 0
+
+# Workers build missing indexes themselves unless deploys run `manage.py release` first
+SCHEMA_AUTO_INDEX = os.getenv('SCHEMA_AUTO_INDEX', 'true').strip().lower() in ('1', 'true', 'yes')
 
 # Create the main app without a prefix
 app = FastAPI()
 
 @app.on_event("startup")
 async def startup_db_client():
+    global _schema_version
+    boot_timer.mark("server handoff")
+    get_http_client()
+    telemetry_exporter.start()
+    clear_dead_workers()
+    boot_timer.mark("startup: http client + telemetry + metrics")
+
     if db is None:
         logging.error("❌ Database initialization skipped (Missing MONGO_URL).")
+        boot_timer.ready()
+        if PRELOAD_AI_STACK:
+            ensure_ai_stack()
         return
 
-    from pymongo import ASCENDING, DESCENDING
     try:
-        # Create indexes for performance optimization
-        await db.books.create_index([("user_id", ASCENDING)])
-        await db.books.create_index([("user_id", ASCENDING), ("status", ASCENDING)])
-        await db.sessions.create_index([("user_id", ASCENDING), ("started_at", DESCENDING)])
-        await db.streaks.create_index([("user_id", ASCENDING)])
-        await db.notes.create_index([("book_id", ASCENDING), ("created_at", DESCENDING)])
-        # PERF: Critical index — every API request queries user_sessions by token
-        await db.user_sessions.create_index([("session_token", ASCENDING)], unique=True)
-        logging.info("✅ MongoDB indexes verified successfully.")
+        # PERF: Index builds are a release-phase job (`python manage.py release`). Workers only
+        # compare the stored marker, so a current schema costs two point reads at boot.
+        schema_version, indexes_ok = await asyncio.gather(get_schema_version(db), indexes_current(db))
+        _schema_version = schema_version
+        if indexes_ok:
+            logging.info("✅ MongoDB indexes current — skipping index builds.")
+        elif SCHEMA_AUTO_INDEX:
+            started = time.perf_counter()
+            built = await ensure_indexes(db)
+            logging.info(f"✅ MongoDB indexes ensured: {len(built)} built in {time.perf_counter() - started:.2f}s.")
+        else:
+            logging.error("❌ MongoDB indexes are out of date. Run `python manage.py release`.")
+        # Read paths assume native BSON dates — warn loudly if the data hasn't been migrated
+        if schema_version < SCHEMA_VERSION:
+            logging.error(
+                f"❌ Database schema is at version {schema_version}, code expects {SCHEMA_VERSION}. "
+                "Run `python manage.py migrate`."
+            )
         logging.info("🚀 Production server is ready and listening.")
     except Exception as e:
         logging.error(f"❌ Database startup failed: {e}")
+    boot_timer.mark("startup: schema check")
+    boot_timer.ready()
+    # Warm the deferred AI/telemetry imports in a thread now that the worker is serving
+    if PRELOAD_AI_STACK:
+        ensure_ai_stack()
 
 # Create a router with the /api prefix
 api_router = APIRouter(prefix="/api")
@@ -196,6 +458,9 @@ class NoteCreate(BaseModel):
     book_id: str
     content: str
 
+class NoteBatchCreate(BaseModel):
+    notes: List[NoteCreate]
+
 class Streak(BaseModel):
     model_config = ConfigDict(extra="ignore")
     user_id: str
@@ -203,6 +468,46 @@ class Streak(BaseModel):
     longest_streak: int = 0
     last_active_date: Optional[str] = None
 
+class BookPage(BaseModel):
+    items: List[Book]
+    next_cursor: Optional[str] = None
+
+class SessionPage(BaseModel):
+    items: List[Session]
+    next_cursor: Optional[str] = None
+
+class NotePage(BaseModel):
+    items: List[Note]
+    next_cursor: Optional[str] = None
+
+class NoteSearchHit(Note):
+    score: float
+    snippet: str
+    highlights: List[List[int]]  # [start, end) offsets into snippet
+
+class NoteSearchPage(BaseModel):
+    items: List[NoteSearchHit]
+    next_cursor: Optional[str] = None
+
+class UserAnalytics(BaseModel):
+    total_minutes: int = 0
+    total_sessions: int = 0
+    average_session_minutes: float = 0
+    books_total: int = 0
+    books_completed: int = 0
+    books_by_status: Dict[str, int] = {}
+    minutes_by_genre: Dict[str, int] = {}
+    daily_goal_minutes: int
+    today_minutes: int = 0
+    daily_goal_progress: float = 0  # today's minutes / goal, capped at 1
+
+class DashboardData(BaseModel):
+    books: List[Book]
+    sessions: List[Session]
+    streak: Streak
+    calendar: Optional[Dict[str, Dict[str, int]]] = None
+    chat_usage: Optional[Dict[str, int]] = None
+
 class OnboardingData(BaseModel):
     reading_type: str
     daily_goal_minutes: int
@@ -223,24 +528,119 @@ class ScoreRequest(BaseModel):
     trace_id: str
     score: int # 1 for up, 0 for down
 
+# ==================== CACHING ====================
+
+class TTLCache:
+    """
+    Bounded in-process LRU cache with per-entry expiry.
+    Entries are evicted least-recently-used once max_entries is reached,
+    and lazily dropped on read once their deadline has passed.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: float):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[str, tuple]" = OrderedDict()  # key -> (deadline, value)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    def get(self, key: str):
+        entry = self._data.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        deadline, value = entry
+        if deadline <= time.monotonic():
+            del self._data[key]
+            self.expirations += 1
+            self.misses += 1
+            return None
+        self._data.move_to_end(key)
+        self.hits += 1
+        return value
+
+    def set(self, key: str, value, ttl_seconds: Optional[float] = None):
+        ttl = self.ttl_seconds if ttl_seconds is None else min(ttl_seconds, self.ttl_seconds)
+        if ttl <= 0 or self.max_entries <= 0:
+            return
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.max_entries:
+            self._data.popitem(last=False)
+            self.evictions += 1
+
+    def pop(self, key: str):
+        entry = self._data.pop(key, None)
+        return entry[1] if entry else None
+
+    def pop_where(self, predicate) -> int:
+        """Drop every entry whose value matches predicate. O(n) — use for rare writes only."""
+        stale = [k for k, (_, v) in self._data.items() if predicate(v)]
+        for k in stale:
+            del self._data[k]
+        return len(stale)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+        }
+
+# PERF: Session-token -> user cache. Every authenticated request resolves the token,
+# so repeated calls (e.g. the 3 parallel dashboard requests) skip the $lookup aggregation.
+# Per-process: with multiple workers a logout only clears this worker's entry, so keep the
+# TTL short — it bounds how long another worker may still accept a revoked token.
+SESSION_CACHE_MAX_ENTRIES = int(os.getenv('SESSION_CACHE_MAX_ENTRIES', '5000'))
+SESSION_CACHE_TTL = float(os.getenv('SESSION_CACHE_TTL_SECONDS', '60'))
+_session_cache = TTLCache(SESSION_CACHE_MAX_ENTRIES, SESSION_CACHE_TTL)
+
+def invalidate_session_cache(token: Optional[str] = None, user_id: Optional[str] = None):
+    """Drop cached auth entries for a token and/or every token belonging to a user."""
+    if token:
+        _session_cache.pop(token)
+    if user_id:
+        _session_cache.pop_where(lambda user_doc: user_doc.get("user_id") == user_id)
+
+def _extract_session_token(request: Request, session_token: Optional[str]) -> Optional[str]:
+    """Resolve the session token from the cookie, falling back to the Authorization header."""
+    if session_token:
+        return session_token
+    auth_header = request.headers.get("Authorization")
+    if auth_header and auth_header.startswith("Bearer "):
+        return auth_header.replace("Bearer ", "")
+    return None
+
 # ==================== AUTH HELPERS ====================
 
 async def get_current_user(request: Request, session_token: Optional[str] = Cookie(None)) -> dict:
-    """Get user from session token (cookie or header) — single DB query via $lookup."""
-    token = session_token
-    
-    # Fallback to Authorization header
-    if not token:
-        auth_header = request.headers.get("Authorization")
-        if auth_header and auth_header.startswith("Bearer "):
-            token = auth_header.replace("Bearer ", "")
+    """Get user from session token (cookie or header) — cached, else single DB query via $lookup."""
+    token = _extract_session_token(request, session_token)
     
     if not token:
         raise HTTPException(status_code=401, detail="Not authenticated")
     
-    # PERF: Single aggregation query instead of 2 sequential find_one calls
+    cached = _session_cache.get(token)
+    if cached is not None:
+        return dict(cached)
+    
+    now = datetime.now(timezone.utc)
+    
+    # PERF: Single aggregation query instead of 2 sequential find_one calls. Expiry is part of
+    # the $match — the TTL monitor only runs once a minute, so expired rows can still be present.
     pipeline = [
-        {"$match": {"session_token": token}},
+        {"$match": {"session_token": token, "expires_at": {"$gt": now}}},
         {"$lookup": {
             "from": "users",
             "localField": "user_id",
@@ -261,21 +661,37 @@ async def get_current_user(request: Request, session_token: Optional[str] = Cook
     
     doc = results[0]
     
-    # Check expiry
     expires_at = doc["expires_at"]
-    if isinstance(expires_at, str):
-        expires_at = datetime.fromisoformat(expires_at)
     if expires_at.tzinfo is None:
         expires_at = expires_at.replace(tzinfo=timezone.utc)
     
-    if expires_at < datetime.now(timezone.utc):
-        raise HTTPException(status_code=401, detail="Session expired")
-    
     user_doc = doc["user_data"]
     # Remove the mongo _id if it leaked through
     user_doc.pop("_id", None)
     
-    return user_doc
+    # Never cache past the session's own expiry
+    _session_cache.set(token, user_doc, ttl_seconds=(expires_at - now).total_seconds())
+    
+    return dict(user_doc)
+
+MAX_SESSIONS_PER_USER = int(os.getenv('MAX_SESSIONS_PER_USER', '10'))
+
+async def create_user_session(user_id: str, session_token: str, expires_at: datetime):
+    """Store a login session, then drop the user's oldest sessions beyond MAX_SESSIONS_PER_USER."""
+    await db.user_sessions.insert_one({
+        "user_id": user_id,
+        "session_token": session_token,
+        "expires_at": expires_at,
+        "created_at": datetime.now(timezone.utc)
+    })
+    
+    surplus = await db.user_sessions.find(
+        {"user_id": user_id}, {"_id": 1, "session_token": 1}
+    ).sort("created_at", -1).skip(MAX_SESSIONS_PER_USER).to_list(None)
+    if surplus:
+        await db.user_sessions.delete_many({"_id": {"$in": [row["_id"] for row in surplus]}})
+        for row in surplus:
+            invalidate_session_cache(token=row["session_token"])
 
 # ==================== AUTH ROUTES ====================
 
@@ -290,6 +706,11 @@ async def google_login(request: Request, response: Response):
             status_code=501, 
             detail="Google OAuth not configured. Please set GOOGLE_CLIENT_ID in environment."
         )
+    try:
+        # First login imports the google.auth stack — in a worker thread, not on the event loop
+        google_oauth = await asyncio.to_thread(get_google_oauth)
+    except ImportError:
+        raise HTTPException(status_code=501, detail="Google OAuth unavailable (google-auth is not installed).")
     
     try:
         body = await request.json()
@@ -346,12 +767,7 @@ async def google_login(request: Request, response: Response):
         
         # Create session
         session_token = google_oauth.generate_session_token()
-        await db.user_sessions.insert_one({
-            "user_id": user_id,
-            "session_token": session_token,
-            "expires_at": google_oauth.create_session_expiry(7),
-            "created_at": datetime.now(timezone.utc)
-        })
+        await create_user_session(user_id, session_token, google_oauth.create_session_expiry(7))
         
         # Set httpOnly cookie
         response.set_cookie(
@@ -385,13 +801,12 @@ async def exchange_session(session_data: SessionData, response: Response):
     This maintains backwards compatibility with Emergent's authentication
     """
     try:
-        # Call Emergent Auth API (PERF: async httpx instead of sync requests)
-        async with httpx.AsyncClient() as http_client:
-            auth_response = await http_client.get(
-                "https://demobackend.emergentagent.com/auth/v1/env/oauth/session-data",
-                headers={"X-Session-ID": session_data.session_id},
-                timeout=10
-            )
+        # Call Emergent Auth API (PERF: shared pooled httpx client)
+        auth_response = await get_http_client().get(
+            EMERGENT_AUTH_URL,
+            headers={"X-Session-ID": session_data.session_id},
+            timeout=http_timeout_for(EMERGENT_AUTH_URL)
+        )
         
         if auth_response.status_code != 200:
             raise HTTPException(status_code=401, detail="Invalid session_id")
@@ -440,12 +855,7 @@ async def exchange_session(session_data: SessionData, response: Response):
         
         # Store session
         session_token = auth_data["session_token"]
-        await db.user_sessions.insert_one({
-            "user_id": user_id,
-            "session_token": session_token,
-            "expires_at": datetime.now(timezone.utc) + timedelta(days=7),
-            "created_at": datetime.now(timezone.utc)
-        })
+        await create_user_session(user_id, session_token, datetime.now(timezone.utc) + timedelta(days=7))
         
         # Set httpOnly cookie
         response.set_cookie(
@@ -475,8 +885,10 @@ async def get_me(request: Request, session_token: Optional[str] = Cookie(None)):
 @api_router.post("/auth/logout")
 async def logout(request: Request, response: Response, session_token: Optional[str] = Cookie(None)):
     """Logout user"""
-    if session_token:
-        await db.user_sessions.delete_one({"session_token": session_token})
+    token = _extract_session_token(request, session_token)
+    if token:
+        invalidate_session_cache(token=token)
+        await db.user_sessions.delete_one({"session_token": token})
     
     response.delete_cookie(key="session_token", path="/", samesite="none", secure=True)
     return {"message": "Logged out"}
@@ -495,36 +907,217 @@ async def complete_onboarding(data: OnboardingData, request: Request, session_to
             "sound_enabled": data.sound_enabled
         }}
     )
+    # Cached user docs for every session of this user are now stale
+    invalidate_session_cache(user_id=user["user_id"])
     
     return {"message": "Onboarding complete"}
 
+# ==================== HEALTH ROUTES ====================
+
+@api_router.get("/health")
+async def health():
+    """Liveness probe with in-process cache counters"""
+    return {
+        "status": "ok",
+        "session_cache": _session_cache.stats(),
+        "http_pool": http_pool_stats(),
+        "book_search_cache": {**_book_search_cache.stats(), "inflight": len(_inflight)},
+        "chat_answer_cache": {**_chat_answer_cache.stats(), "enabled": CHAT_ANSWER_CACHE_ENABLED},
+        "telemetry": telemetry_exporter.stats(),
+        "startup": boot_timer.report(),
+    }
+
+# Prometheus scrape target — lives at the root, outside /api, as scrapers expect
+METRICS_TOKEN = os.getenv('METRICS_TOKEN', '').strip()
+if METRICS_ENABLED and not METRICS_TOKEN:
+    print("⚠️  METRICS_TOKEN not set — /metrics is public. Set it (scrapers send it as a Bearer token) outside local development.")
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics_endpoint(request: Request):
+    """Request/latency/in-flight per route and Gemini usage, summed over all workers"""
+    if not METRICS_ENABLED:
+        raise HTTPException(status_code=501, detail="Metrics disabled (prometheus-client not installed or METRICS_ENABLED=false).")
+    if METRICS_TOKEN and request.headers.get("Authorization") != f"Bearer {METRICS_TOKEN}":
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    # Reads every worker's mmap files — off the event loop
+    body, content_type = await asyncio.to_thread(render_metrics)
+    return Response(content=body, media_type=content_type)
+
+# ==================== CONDITIONAL RESPONSES ====================
+
+# PERF: Every book/session/note/streak mutation bumps a per-user version. Read endpoints
+# derive a weak ETag from it, so an unchanged poll costs one _id lookup and returns 304
+# without running the list query or serializing anything.
+async def bump_data_version(user_id: str):
+    """Call after a mutation's writes have completed."""
+    await db.data_versions.update_one({"_id": user_id}, {"$inc": {"version": 1}}, upsert=True)
+
+async def get_data_version(user_id: str) -> int:
+    doc = await db.data_versions.find_one({"_id": user_id}, {"version": 1})
+    return doc["version"] if doc else 0
+
+def data_etag(request: Request, user_id: str, version: int, variant: str = "") -> str:
+    # Scoped to user + URL (incl. query) + negotiated format so representations never collide
+    scope = f"{user_id}|{request.url.path}?{request.url.query}|{request.headers.get('accept', '')}|{variant}"
+    digest = hashlib.sha1(scope.encode()).hexdigest()[:12]
+    return f'W/"{version}-{digest}"'
+
+async def check_not_modified(request: Request, response: Response, user_id: str, variant: str = "") -> Optional[Response]:
+    """
+    Return a 304 if the client's If-None-Match is current, else stamp the ETag on response.
+    `variant` covers inputs not in the URL (e.g. the current month) that change the payload.
+    """
+    etag = data_etag(request, user_id, await get_data_version(user_id), variant)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    # Weak comparison (RFC 9110): ignore the W/ prefix on either side
+    client_tags = {t.strip().removeprefix("W/") for t in request.headers.get("if-none-match", "").split(",")}
+    if etag.removeprefix("W/") in client_tags or "*" in client_tags:
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
+    return None
+
+# ==================== SERIALIZATION ====================
+
+# PERF: Hot list routes serialize documents that are already in response shape
+# (projection + model defaults) straight to bytes — orjson, or MessagePack when the
+# client sends `Accept: application/msgpack` — instead of re-validating every document
+# through response_model and the stdlib json encoder. response_model stays for the docs.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+    logger.warning("⚠️  orjson not installed — list routes fall back to stdlib JSON.")
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+MSGPACK_MEDIA_TYPE = "application/msgpack"
+
+def _msgpack_default(obj):
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    raise TypeError(f"Cannot serialize {type(obj).__name__} to MessagePack")
+
+class MsgPackResponse(Response):
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, default=_msgpack_default, use_bin_type=True)
+
+class OrjsonResponse(Response):
+    # Plain Response + orjson.dumps: FastAPI's ORJSONResponse is deprecated (warns per request)
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+def model_projection(model) -> dict:
+    """Mongo inclusion projection for exactly the fields a response model exposes."""
+    return {"_id": 0, **{name: 1 for name in model.model_fields}}
+
+def model_defaults(model) -> dict:
+    return {name: field.default for name, field in model.model_fields.items() if not field.is_required()}
+
+def shape_documents(docs: list, defaults: dict) -> list:
+    """Fill model defaults for fields missing on older documents (what response_model did)."""
+    return [{**defaults, **doc} for doc in docs]
+
+def fast_response(request: Request, response: Response, content: Any) -> Response:
+    """Serialize pre-shaped content, honouring Accept and headers set on the injected response (ETag)."""
+    headers = {k: v for k, v in response.headers.items() if k.lower() != "content-length"}
+    headers["Vary"] = "Accept"
+    if msgpack is not None and MSGPACK_MEDIA_TYPE in request.headers.get("accept", ""):
+        return MsgPackResponse(content, headers=headers)
+    if orjson is not None:
+        return OrjsonResponse(content, headers=headers)
+    return JSONResponse(jsonable_encoder(content), headers=headers)
+
+# ==================== PAGINATION ====================
+
+# Keyset pagination: pages are ordered newest-first by (timestamp, id) and the opaque
+# cursor encodes the last item's pair, so each page is one index-backed range scan.
+PAGE_DEFAULT_LIMIT = 50
+PAGE_MAX_LIMIT = 200
+
+def encode_cursor(doc: dict, time_field: str, id_field: str) -> str:
+    ts = doc[time_field]
+    payload = {"t": ts.isoformat(), "id": doc[id_field]}
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> tuple:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+        return datetime.fromisoformat(payload["t"]), str(payload["id"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+async def fetch_page(collection, query: dict, projection: dict, time_field: str, id_field: str,
+                     limit: int, cursor: Optional[str]) -> tuple:
+    """Return (docs, next_cursor) for one newest-first keyset page."""
+    limit = max(1, min(limit, PAGE_MAX_LIMIT))
+    query = dict(query)
+    if cursor:
+        ts, last_id = decode_cursor(cursor)
+        query["$or"] = [
+            {time_field: {"$lt": ts}},
+            {time_field: ts, id_field: {"$lt": last_id}},
+        ]
+    docs = await collection.find(query, projection).sort(
+        [(time_field, -1), (id_field, -1)]
+    ).limit(limit + 1).to_list(limit + 1)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1], time_field, id_field)
+    return docs, next_cursor
+
 # ==================== BOOK ROUTES ====================
 
-@api_router.get("/books", response_model=List[Book])
-async def get_books(request: Request, session_token: Optional[str] = Cookie(None)):
-    """Get all books for current user"""
+# Exactly the Book fields — never the persisted chat grounding context
+BOOK_PROJECTION = model_projection(Book)
+BOOK_DEFAULTS = model_defaults(Book)
+
+@api_router.get("/books", response_model=Union[List[Book], BookPage])
+async def get_books(request: Request, response: Response, session_token: Optional[str] = Cookie(None), paginate: bool = False,
+                    cursor: Optional[str] = None, limit: int = PAGE_DEFAULT_LIMIT):
+    """Get books for current user — all (legacy list) or one keyset page with ?paginate=true / ?cursor="""
     user = await get_current_user(request, session_token)
+    not_modified = await check_not_modified(request, response, user["user_id"])
+    if not_modified:
+        return not_modified
     
-    books = await db.books.find(
-        {"user_id": user["user_id"]},
-        {"_id": 0}
-    ).to_list(1000)
-    
-    for book in books:
-        if isinstance(book.get("created_at"), str):
-            book["created_at"] = datetime.fromisoformat(book["created_at"])
+    if not (paginate or cursor):
+        return fast_response(request, response, await load_books(user["user_id"]))
     
-    return books
+    books, next_cursor = await fetch_page(
+        db.books, {"user_id": user["user_id"]}, BOOK_PROJECTION, "created_at", "book_id", limit, cursor
+    )
+    return fast_response(request, response, {"items": shape_documents(books, BOOK_DEFAULTS), "next_cursor": next_cursor})
+
+async def load_books(user_id: str) -> list:
+    """All books of a user in response shape (capped at 1000)"""
+    books = await db.books.find({"user_id": user_id}, BOOK_PROJECTION).to_list(1000)
+    return shape_documents(books, BOOK_DEFAULTS)
 
 @api_router.post("/books", response_model=Book)
 async def create_book(book_data: BookCreate, request: Request, session_token: Optional[str] = Cookie(None)):
     """Create a new book"""
     user = await get_current_user(request, session_token)
     
-    book_id = f"book_{uuid.uuid4().hex[:12]}"
-    new_book = {
-        "book_id": book_id,
-        "user_id": user["user_id"],
+    new_book = new_book_doc(user["user_id"], book_data)
+    await db.books.insert_one(new_book)
+    await apply_user_stats(user["user_id"], book_stats_delta(None, new_book))
+    await bump_data_version(user["user_id"])
+    return Book(**new_book)
+
+def new_book_doc(user_id: str, book_data: BookCreate) -> dict:
+    """Build the stored document for a new book (shared by single create and bulk import)."""
+    return {
+        "book_id": f"book_{uuid.uuid4().hex[:12]}",
+        "user_id": user_id,
         "title": book_data.title,
         "author": book_data.author,
         "genre": book_data.genre or "General",
@@ -538,9 +1131,6 @@ async def create_book(book_data: BookCreate, request: Request, session_token: Op
         "total_sessions": 0,
         "created_at": datetime.now(timezone.utc)
     }
-    
-    await db.books.insert_one(new_book)
-    return Book(**new_book)
 
 @api_router.patch("/books/{book_id}", response_model=Book)
 async def update_book(book_id: str, book_update: BookUpdate, request: Request, session_token: Optional[str] = Cookie(None)):
@@ -551,87 +1141,202 @@ async def update_book(book_id: str, book_update: BookUpdate, request: Request, s
     
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
-        
-    result = await db.books.update_one(
-        {"book_id": book_id, "user_id": user["user_id"]},
-        {"$set": update_data}
+    
+    return Book(**await apply_book_update(user["user_id"], book_id, update_data))
+
+async def apply_book_update(user_id: str, book_id: str, update_data: dict) -> dict:
+    """
+    Apply a book update and keep user_stats in step. Returns the updated book.
+    PERF: One find_one_and_update returning the previous version gives both the
+    stats delta and the response, instead of update + re-read.
+    """
+    before = await db.books.find_one_and_update(
+        {"book_id": book_id, "user_id": user_id},
+        {"$set": update_data},
+        projection=BOOK_PROJECTION,
+        return_document=ReturnDocument.BEFORE
     )
     
-    if result.matched_count == 0:
+    if not before:
         raise HTTPException(status_code=404, detail="Book not found")
+    
+    updated_book = {**before, **update_data}
+    await apply_user_stats(user_id, book_stats_delta(before, updated_book))
+    # After the writes land, so a concurrent reader can't tag old data with the new version
+    await bump_data_version(user_id)
+    return updated_book
+
+# --- Book search cache ---
+# PERF: L1 in-process cache + optional L2 Mongo collection (TTL-indexed) shared across workers.
+# Fresh entries are served directly; stale ones are served immediately while one background
+# refresh runs (stale-while-revalidate). Concurrent identical misses share one upstream call.
+BOOK_SEARCH_FRESH_SECONDS = int(os.getenv('BOOK_SEARCH_FRESH_SECONDS', '3600'))
+BOOK_SEARCH_STALE_SECONDS = int(os.getenv('BOOK_SEARCH_STALE_SECONDS', '86400'))
+BOOK_SEARCH_CACHE_MAX_ENTRIES = int(os.getenv('BOOK_SEARCH_CACHE_MAX_ENTRIES', '2000'))
+BOOK_SEARCH_L2_ENABLED = os.getenv('BOOK_SEARCH_L2_ENABLED', 'true').strip().lower() in ('1', 'true', 'yes')
+
+_book_search_cache = TTLCache(BOOK_SEARCH_CACHE_MAX_ENTRIES, BOOK_SEARCH_STALE_SECONDS)
+_inflight: Dict[str, asyncio.Future] = {}
+_revalidate_tasks = set()  # strong refs so background refreshes aren't garbage-collected
+
+def normalize_search_query(q: str) -> str:
+    """Case- and whitespace-insensitive cache key for a search query."""
+    return " ".join(q.lower().split())
+
+async def single_flight(key: str, factory):
+    """
+    Run factory() once per key at a time; concurrent callers await the same result.
+    The shared future is shielded so one caller disconnecting doesn't cancel the others.
+    """
+    future = _inflight.get(key)
+    if future is None:
+        future = asyncio.ensure_future(factory())
+        _inflight[key] = future
+
+        def _done(f, key=key):
+            _inflight.pop(key, None)
+            if not f.cancelled() and f.exception() is not None:
+                logging.warning(f"Background fetch for '{key}' failed: {f.exception()}")
+        future.add_done_callback(_done)
+    return await asyncio.shield(future)
+
+def _rate_limited_search_fallback(q: str) -> list:
+    # Provide a fallback mock response so the UI doesn't break if API key is missing
+    return [
+        {
+            "id": "mock-1",
+            "title": q.title() + " (External Search Unavailable)",
+            "authors": ["Unknown Author"],
+            "description": "The Google Books API is currently rate-limited or missing an API key. You can still add this book manually, but detailed metadata is unavailable.",
+            "cover_url": "",
+            "page_count": 300,
+            "categories": ["General"],
+            "published_date": "2024"
+        }
+    ]
+
+async def _fetch_google_books(query: str) -> Optional[list]:
+    """Query Google Books; returns None when rate-limited so the caller can fall back uncached."""
+    url = GOOGLE_BOOKS_API_URL
+    params = {"q": query, "maxResults": 10}
+    
+    # Append API key if available
+    google_books_key = os.environ.get('GOOGLE_BOOKS_API_KEY', '')
+    if google_books_key:
+        params["key"] = google_books_key
+    else:
+        logging.warning("Google Books API key MISSING from environment. Search might be rate-limited.")
+        
+    # PERF: shared pooled httpx client (no event loop blocking, no per-call handshake)
+    response = await get_http_client().get(url, params=params, timeout=http_timeout_for(url))
+    
+    if response.status_code == 429:
+        logging.error("Google Books API 429 Rate Limit. Returning fallback data.")
+        return None
+        
+    response.raise_for_status()
+    data = response.json()
+    
+    results = []
+    for item in data.get("items", []):
+        info = item.get("volumeInfo", {})
+        
+        # Sanitization logic (re is imported at top level)
+        description = info.get("description", "")
+        if description:
+            description = re.sub('<[^<]+?>', '', description)
         
-    updated_book = await db.books.find_one({"book_id": book_id}, {"_id": 0})
-    return Book(**updated_book)
+        # Best possible image
+        images = info.get("imageLinks", {})
+        cover_url = images.get("extraLarge") or images.get("large") or images.get("thumbnail")
+        
+        # Switch http to https for covers to avoid mixed content errors
+        if cover_url and cover_url.startswith("http://"):
+            cover_url = cover_url.replace("http://", "https://")
+        
+        results.append({
+            "id": item.get("id"),
+            "title": info.get("title", "Unknown Title"),
+            "authors": info.get("authors", ["Unknown Author"]),
+            "description": description[:500] if description else None,
+            "cover_url": cover_url,
+            "page_count": info.get("pageCount"),
+            "categories": info.get("categories", ["General"]),
+            "published_date": info.get("publishedDate")
+        })
+        
+    return results
+
+async def _refresh_book_search(key: str) -> Optional[list]:
+    """Fetch upstream and populate both cache levels. Rate-limited responses are not cached."""
+    results = await _fetch_google_books(key)
+    if results is None:
+        return None
+    now = datetime.now(timezone.utc)
+    _book_search_cache.set(key, {"results": results, "fetched_at": now})
+    if BOOK_SEARCH_L2_ENABLED and db is not None:
+        try:
+            await db.book_search_cache.replace_one(
+                {"_id": key},
+                {
+                    "results": results,
+                    "fetched_at": now,
+                    "expires_at": now + timedelta(seconds=BOOK_SEARCH_STALE_SECONDS),
+                },
+                upsert=True
+            )
+        except Exception as e:
+            logging.warning(f"Book search L2 write failed: {e}")
+    return results
+
+async def _revalidate_book_search(key: str):
+    try:
+        await single_flight(key, lambda: _refresh_book_search(key))
+    except Exception:
+        pass  # already logged by single_flight; the stale entry keeps serving
+
+async def _cached_book_search_entry(key: str) -> Optional[dict]:
+    entry = _book_search_cache.get(key)
+    if entry is not None or not BOOK_SEARCH_L2_ENABLED or db is None:
+        return entry
+    try:
+        doc = await db.book_search_cache.find_one(
+            {"_id": key, "expires_at": {"$gt": datetime.now(timezone.utc)}}
+        )
+    except Exception as e:
+        logging.warning(f"Book search L2 read failed: {e}")
+        return None
+    if not doc:
+        return None
+    fetched_at = doc["fetched_at"]
+    if fetched_at.tzinfo is None:
+        fetched_at = fetched_at.replace(tzinfo=timezone.utc)
+    entry = {"results": doc["results"], "fetched_at": fetched_at}
+    remaining = BOOK_SEARCH_STALE_SECONDS - (datetime.now(timezone.utc) - fetched_at).total_seconds()
+    _book_search_cache.set(key, entry, ttl_seconds=remaining)
+    return entry
 
 @api_router.get("/books/search", response_model=List[BookDiscovery])
 async def search_books(q: str):
-    """Search for books using Google Books API"""
-    if not q:
+    """Search for books using Google Books API (cached, coalesced)"""
+    key = normalize_search_query(q or "")
+    if not key:
         return []
         
     try:
-        url = "https://www.googleapis.com/books/v1/volumes"
-        params = {"q": q, "maxResults": 10}
-        
-        # Append API key if available
-        google_books_key = os.environ.get('GOOGLE_BOOKS_API_KEY', '')
-        if google_books_key:
-            params["key"] = google_books_key
-        else:
-            logging.warning("Google Books API key MISSING from environment. Search might be rate-limited.")
-            
-        # PERF: async httpx instead of sync requests (no event loop blocking)
-        headers = {"User-Agent": "ImmersiveReadingApp/1.0"}
-        async with httpx.AsyncClient(headers=headers) as http_client:
-            response = await http_client.get(url, params=params, timeout=10)
-        
-        if response.status_code == 429:
-            # Provide a fallback mock response so the UI doesn't break if API key is missing
-            logging.error("Google Books API 429 Rate Limit. Returning fallback data.")
-            return [
-                {
-                    "id": "mock-1",
-                    "title": q.title() + " (External Search Unavailable)",
-                    "authors": ["Unknown Author"],
-                    "description": "The Google Books API is currently rate-limited or missing an API key. You can still add this book manually, but detailed metadata is unavailable.",
-                    "cover_url": "",
-                    "page_count": 300,
-                    "categories": ["General"],
-                    "published_date": "2024"
-                }
-            ]
-            
-        response.raise_for_status()
-        data = response.json()
+        entry = await _cached_book_search_entry(key)
+        if entry is not None:
+            age = (datetime.now(timezone.utc) - entry["fetched_at"]).total_seconds()
+            if age >= BOOK_SEARCH_FRESH_SECONDS:
+                # Stale: answer now, revalidate in the background (at most one refresh per key)
+                task = asyncio.create_task(_revalidate_book_search(key))
+                _revalidate_tasks.add(task)
+                task.add_done_callback(_revalidate_tasks.discard)
+            return entry["results"]
         
-        results = []
-        for item in data.get("items", []):
-            info = item.get("volumeInfo", {})
-            
-            # Sanitization logic (re is imported at top level)
-            description = info.get("description", "")
-            if description:
-                description = re.sub('<[^<]+?>', '', description)
-            
-            # Best possible image
-            images = info.get("imageLinks", {})
-            cover_url = images.get("extraLarge") or images.get("large") or images.get("thumbnail")
-            
-            # Switch http to https for covers to avoid mixed content errors
-            if cover_url and cover_url.startswith("http://"):
-                cover_url = cover_url.replace("http://", "https://")
-            
-            results.append({
-                "id": item.get("id"),
-                "title": info.get("title", "Unknown Title"),
-                "authors": info.get("authors", ["Unknown Author"]),
-                "description": description[:500] if description else None,
-                "cover_url": cover_url,
-                "page_count": info.get("pageCount"),
-                "categories": info.get("categories", ["General"]),
-                "published_date": info.get("publishedDate")
-            })
-            
+        results = await single_flight(key, lambda: _refresh_book_search(key))
+        if results is None:
+            return _rate_limited_search_fallback(q)
         return results
     except Exception as e:
         import traceback
@@ -645,15 +1350,12 @@ async def get_book(book_id: str, request: Request, session_token: Optional[str]
     
     book = await db.books.find_one(
         {"book_id": book_id, "user_id": user["user_id"]},
-        {"_id": 0}
+        BOOK_PROJECTION
     )
     
     if not book:
         raise HTTPException(status_code=404, detail="Book not found")
     
-    if isinstance(book.get("created_at"), str):
-        book["created_at"] = datetime.fromisoformat(book["created_at"])
-    
     return book
 
 @api_router.put("/books/{book_id}", response_model=Book)
@@ -667,35 +1369,227 @@ async def update_book(book_id: str, book_update: BookUpdate, request: Request, s
     if not update_data:
         raise HTTPException(status_code=400, detail="No fields to update")
     
-    result = await db.books.update_one(
+    return Book(**await apply_book_update(user["user_id"], book_id, update_data))
+
+@api_router.delete("/books/{book_id}")
+async def delete_book(book_id: str, request: Request, session_token: Optional[str] = Cookie(None)):
+    """Delete a book"""
+    user = await get_current_user(request, session_token)
+    
+    deleted = await db.books.find_one_and_delete(
         {"book_id": book_id, "user_id": user["user_id"]},
-        {"$set": update_data}
+        projection=BOOK_STATS_PROJECTION
     )
     
-    if result.matched_count == 0:
+    if not deleted:
         raise HTTPException(status_code=404, detail="Book not found")
+    await apply_user_stats(user["user_id"], book_stats_delta(deleted, None))
+    await bump_data_version(user["user_id"])
     
-    updated_book = await db.books.find_one(
-        {"book_id": book_id},
-        {"_id": 0}
+    return {"message": "Book deleted"}
+
+# ==================== BULK IMPORT ====================
+
+IMPORT_BATCH_SIZE = int(os.getenv('IMPORT_BATCH_SIZE', '500'))
+IMPORT_MAX_ROWS = int(os.getenv('IMPORT_MAX_ROWS', '20000'))
+IMPORT_MAX_BYTES = int(os.getenv('IMPORT_MAX_BYTES', str(10 * 1024 * 1024)))
+IMPORT_MAX_ERRORS = 100  # per-row errors kept on the job document
+# A running job whose progress hasn't moved for this long lost its worker (restart/crash)
+IMPORT_STALE_SECONDS = int(os.getenv('IMPORT_STALE_SECONDS', '600'))
+IMPORT_SPOOL_CHUNK = 64 * 1024
+
+BOOK_STATUSES = ("want_to_read", "currently_reading", "completed")
+
+# Column aliases: our own field names first, then Goodreads library export headers
+IMPORT_COLUMNS = {
+    "title": ("title", "Title"),
+    "author": ("author", "Author"),
+    "genre": ("genre", "Genre"),
+    "cover_url": ("cover_url", "Cover URL"),
+    "description": ("description", "Description"),
+    "page_count": ("page_count", "Number of Pages"),
+    "status": ("status", "Exclusive Shelf"),
+    "google_books_id": ("google_books_id",),
+}
+GOODREADS_SHELVES = {"read": "completed", "currently-reading": "currently_reading", "to-read": "want_to_read"}
+
+_import_tasks = set()  # strong refs so running imports aren't garbage-collected
+
+def import_row_to_book(row: dict) -> BookCreate:
+    """Map one CSV row onto BookCreate. Raises ValueError (incl. ValidationError) on bad rows."""
+    data = {}
+    for field, aliases in IMPORT_COLUMNS.items():
+        for alias in aliases:
+            value = (row.get(alias) or "").strip()
+            if value:
+                data[field] = value
+                break
+    if "status" in data:
+        data["status"] = GOODREADS_SHELVES.get(data["status"], data["status"])
+        if data["status"] not in BOOK_STATUSES:
+            raise ValueError(f"status: unknown shelf '{data['status']}'")
+    return BookCreate(**data)
+
+def _format_import_error(e: ValueError) -> str:
+    if isinstance(e, ValidationError):
+        return "; ".join(f"{'.'.join(map(str, err['loc']))}: {err['msg']}" for err in e.errors())
+    return str(e)
+
+def _read_rows(reader, count: int) -> list:
+    return list(itertools.islice(reader, count))
+
+def _spool_upload(source, spool, max_bytes: int) -> bool:
+    """Copy the upload in chunks; False (and stop) as soon as it exceeds max_bytes."""
+    copied = 0
+    while True:
+        chunk = source.read(IMPORT_SPOOL_CHUNK)
+        if not chunk:
+            return True
+        copied += len(chunk)
+        if copied > max_bytes:
+            return False
+        spool.write(chunk)
+
+async def _run_book_import(job_id: str, user_id: str, spool):
+    """
+    Parse the spooled CSV in bounded batches (file I/O in a worker thread) and insert each
+    batch with insert_many(ordered=False), recording progress on the job document.
+    """
+    processed = imported = failed = 0
+    status, error = "completed", None
+    try:
+        reader = csv.DictReader(io.TextIOWrapper(spool, encoding="utf-8-sig", errors="replace", newline=""))
+        while processed < IMPORT_MAX_ROWS:
+            rows = await asyncio.to_thread(_read_rows, reader, min(IMPORT_BATCH_SIZE, IMPORT_MAX_ROWS - processed))
+            if not rows:
+                break
+            
+            docs, doc_rows, errors = [], [], []
+            for offset, row in enumerate(rows):
+                row_number = processed + offset + 2  # 1-based, after the header line
+                try:
+                    docs.append(new_book_doc(user_id, import_row_to_book(row)))
+                    doc_rows.append(row_number)
+                except ValueError as e:
+                    errors.append({"row": row_number, "error": _format_import_error(e)})
+            
+            inserted = 0
+            failed_indexes = set()
+            if docs:
+                try:
+                    result = await db.books.insert_many(docs, ordered=False)
+                    inserted = len(result.inserted_ids)
+                except BulkWriteError as e:
+                    inserted = e.details.get("nInserted", 0)
+                    for write_error in e.details.get("writeErrors", []):
+                        failed_indexes.add(write_error["index"])
+                        errors.append({
+                            "row": doc_rows[write_error["index"]],
+                            "error": write_error.get("errmsg", "write failed")
+                        })
+            
+            processed += len(rows)
+            imported += inserted
+            failed += len(rows) - inserted
+            if inserted:
+                stats_delta = merge_stats_deltas(
+                    book_stats_delta(None, doc) for i, doc in enumerate(docs) if i not in failed_indexes
+                )
+                await apply_user_stats(user_id, stats_delta)
+                await bump_data_version(user_id)
+            await db.import_jobs.update_one(
+                {"job_id": job_id},
+                {
+                    "$set": {"processed": processed, "imported": imported, "failed": failed,
+                             "updated_at": datetime.now(timezone.utc)},
+                    "$push": {"errors": {"$each": errors, "$slice": IMPORT_MAX_ERRORS}},
+                }
+            )
+        
+        if processed >= IMPORT_MAX_ROWS and await asyncio.to_thread(_read_rows, reader, 1):
+            error = f"Import stopped after {IMPORT_MAX_ROWS} rows"
+    except Exception as e:
+        logging.error(f"Book import {job_id} failed: {e}\n{traceback.format_exc()}")
+        status, error = "failed", str(e)
+    finally:
+        spool.close()
+    
+    await db.import_jobs.update_one(
+        {"job_id": job_id},
+        {"$set": {"status": status, "error": error, "finished_at": datetime.now(timezone.utc)}}
     )
-    
-    return Book(**updated_book)
 
-@api_router.delete("/books/{book_id}")
-async def delete_book(book_id: str, request: Request, session_token: Optional[str] = Cookie(None)):
-    """Delete a book"""
+@api_router.post("/books/import", status_code=202)
+async def import_books(request: Request, file: UploadFile = File(...), session_token: Optional[str] = Cookie(None)):
+    """
+    Bulk-import books from a CSV (our column names or a Goodreads library export).
+    Runs in the background; poll GET /books/import/{job_id} for progress and row errors.
+    """
     user = await get_current_user(request, session_token)
     
-    result = await db.books.delete_one({"book_id": book_id, "user_id": user["user_id"]})
+    # The upload is closed once this handler returns, so spool it to our own temp file first
+    spool = tempfile.TemporaryFile()
+    if not await asyncio.to_thread(_spool_upload, file.file, spool, IMPORT_MAX_BYTES):
+        spool.close()
+        raise HTTPException(status_code=413, detail=f"Import file larger than {IMPORT_MAX_BYTES // (1024 * 1024)} MB")
+    spool.seek(0)
     
-    if result.deleted_count == 0:
-        raise HTTPException(status_code=404, detail="Book not found")
+    job = {
+        "job_id": f"import_{uuid.uuid4().hex[:12]}",
+        "user_id": user["user_id"],
+        "filename": file.filename,
+        "status": "running",
+        "processed": 0,
+        "imported": 0,
+        "failed": 0,
+        "errors": [],
+        "error": None,
+        "created_at": datetime.now(timezone.utc),
+        "updated_at": datetime.now(timezone.utc),
+        "finished_at": None,
+    }
+    await db.import_jobs.insert_one(job)
+    job.pop("_id", None)
     
-    return {"message": "Book deleted"}
+    task = asyncio.create_task(_run_book_import(job["job_id"], user["user_id"], spool))
+    _import_tasks.add(task)
+    task.add_done_callback(_import_tasks.discard)
+    
+    return job
+
+@api_router.get("/books/import/{job_id}")
+async def get_import_job(job_id: str, request: Request, session_token: Optional[str] = Cookie(None)):
+    """Get progress and per-row errors of a bulk import"""
+    user = await get_current_user(request, session_token)
+    
+    job = await db.import_jobs.find_one({"job_id": job_id, "user_id": user["user_id"]}, {"_id": 0})
+    if not job:
+        raise HTTPException(status_code=404, detail="Import not found")
+    
+    # Jobs run in-process: if the worker restarted mid-import nothing will ever finish it.
+    # No progress for IMPORT_STALE_SECONDS means it's gone — fail it so clients stop polling.
+    last_progress = job.get("updated_at") or job["created_at"]
+    if last_progress.tzinfo is None:
+        last_progress = last_progress.replace(tzinfo=timezone.utc)
+    now = datetime.now(timezone.utc)
+    if job["status"] == "running" and now - last_progress > timedelta(seconds=IMPORT_STALE_SECONDS):
+        stale = await db.import_jobs.find_one_and_update(
+            {"job_id": job_id, "status": "running", "updated_at": job.get("updated_at")},
+            {"$set": {"status": "failed", "error": "Import interrupted (server restarted) — please re-upload",
+                      "finished_at": now}},
+            projection={"_id": 0},
+            return_document=ReturnDocument.AFTER
+        )
+        if stale:
+            job = stale
+    
+    return job
 
 # ==================== SESSION ROUTES ====================
 
+SESSION_PROJECTION = model_projection(Session)
+SESSION_DEFAULTS = model_defaults(Session)
+
 @api_router.post("/sessions", response_model=Session)
 async def start_session(session_data: SessionCreate, request: Request, session_token: Optional[str] = Cookie(None)):
     """Start a reading session"""
@@ -724,6 +1618,7 @@ async def start_session(session_data: SessionCreate, request: Request, session_t
     }
     
     await db.sessions.insert_one(new_session)
+    await bump_data_version(user["user_id"])
     return Session(**new_session)
 
 @api_router.post("/sessions/{session_id}/complete")
@@ -731,160 +1626,336 @@ async def complete_session(session_id: str, completion: SessionComplete, request
     """Complete a reading session"""
     user = await get_current_user(request, session_token)
     
-    session = await db.sessions.find_one(
-        {"session_id": session_id, "user_id": user["user_id"]},
-        {"_id": 0}
-    )
-    
-    if not session:
-        raise HTTPException(status_code=404, detail="Session not found")
-    
     ended_at = datetime.now(timezone.utc)
     
-    # Calculate actual minutes spent from timestamps
-    started_at = session["started_at"]
-    if isinstance(started_at, str):
-        started_at = datetime.fromisoformat(started_at)
+    # Actual minutes from timestamps (at least 1); if the client sent a value (e.g. from a
+    # client-side timer), use the smaller one to be conservative
+    elapsed_minutes = {"$max": [1, {"$round": [{"$divide": [{"$subtract": [ended_at, "$started_at"]}, 60000]}, 0]}]}
+    if completion.actual_minutes is not None:
+        elapsed_minutes = {"$min": [elapsed_minutes, completion.actual_minutes]}
+    
+    # PERF: Fetch + stamp in one atomic round trip. Matching only unfinished sessions means
+    # a double submit (e.g. two tabs, a re-fired timer) can't count the same session twice.
+    session = await db.sessions.find_one_and_update(
+        {"session_id": session_id, "user_id": user["user_id"], "ended_at": None},
+        [{"$set": {"ended_at": ended_at, "actual_minutes": elapsed_minutes}}],
+        projection={"_id": 0, "book_id": 1, "started_at": 1, "duration_minutes": 1, "actual_minutes": 1},
+        return_document=ReturnDocument.AFTER
+    )
     
-    # Ensure aware datetime to prevent subtraction error
-    if started_at.tzinfo is None:
-        started_at = started_at.replace(tzinfo=timezone.utc)
+    if not session:
+        # Idempotent: a repeat completion answers with what the first one recorded
+        completed, streak = await asyncio.gather(
+            db.sessions.find_one({"session_id": session_id, "user_id": user["user_id"]}, {"_id": 0, "actual_minutes": 1}),
+            db.streaks.find_one({"user_id": user["user_id"]}, {"_id": 0, "current_streak": 1, "longest_streak": 1})
+        )
+        if not completed:
+            raise HTTPException(status_code=404, detail="Session not found")
+        return {
+            "message": "Session already completed",
+            "minutes": completed.get("actual_minutes") or 0,
+            "streak": streak or {"current_streak": 0, "longest_streak": 0},
+        }
     
-    # Calculate difference in minutes
-    time_diff = ended_at - started_at
-    actual_minutes = max(1, round(time_diff.total_seconds() / 60))
+    actual_minutes = session["actual_minutes"]
     
-    # If client specifically sent a value (e.g. from a client-side timer), use the smaller one to be conservative
-    if completion.actual_minutes is not None:
-        actual_minutes = min(actual_minutes, completion.actual_minutes)
+    # Calendar rollup uses the same per-session capping as the historical aggregation
+    activity_date = session["started_at"].date().isoformat()
+    activity_minutes = calendar_minutes(actual_minutes, session.get("duration_minutes", 30))
     
     # PERF: Run independent writes in parallel with asyncio.gather
-    async def _update_streak():
-        """Update streak — needs its own query first, so runs as coroutine."""
-        today = datetime.now(timezone.utc).date().isoformat()
-        streak = await db.streaks.find_one({"user_id": user["user_id"]}, {"_id": 0})
-        if streak:
-            last_active = streak.get("last_active_date")
-            current_streak = streak.get("current_streak", 0)
-            longest_streak = streak.get("longest_streak", 0)
-            
-            if last_active == today:
-                pass  # Already logged today
-            elif last_active:
-                from datetime import date
-                last_date = date.fromisoformat(last_active)
-                today_date = date.fromisoformat(today)
-                days_diff = (today_date - last_date).days
-                current_streak = current_streak + 1 if days_diff == 1 else 1
-            else:
-                current_streak = 1
-            
-            longest_streak = max(longest_streak, current_streak)
-            await db.streaks.update_one(
-                {"user_id": user["user_id"]},
-                {"$set": {
-                    "current_streak": current_streak,
-                    "longest_streak": longest_streak,
-                    "last_active_date": today
-                }}
-            )
-    
-    await asyncio.gather(
-        # 1. Update session document
-        db.sessions.update_one(
-            {"session_id": session_id},
-            {"$set": {"ended_at": ended_at, "actual_minutes": actual_minutes}}
-        ),
-        # 2. Update book stats
-        db.books.update_one(
+    book_before, streak, _ = await asyncio.gather(
+        # 1. Update book stats (previous version feeds the user_stats delta)
+        db.books.find_one_and_update(
             {"book_id": session["book_id"]},
             {
                 "$inc": {"total_minutes": actual_minutes, "total_sessions": 1},
                 "$set": {"status": "currently_reading"}
-            }
+            },
+            projection=BOOK_STATS_PROJECTION,
+            return_document=ReturnDocument.BEFORE
+        ),
+        # 2. Update streak — single atomic pipeline update, no read-then-write race
+        db.streaks.find_one_and_update(
+            {"user_id": user["user_id"]},
+            streak_update_pipeline(datetime.now(timezone.utc).date()),
+            projection={"_id": 0, "current_streak": 1, "longest_streak": 1},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
         ),
-        # 3. Update streak (has internal read-then-write)
-        _update_streak()
+        # 3. Bump the materialized daily calendar rollup
+        db.daily_activity.update_one(
+            {"user_id": user["user_id"], "date": activity_date},
+            {"$inc": {"sessions": 1, "minutes": activity_minutes}},
+            upsert=True
+        )
     )
     
-    return {"message": "Session completed", "minutes": actual_minutes}
+    stats_delta = {"total_minutes": actual_minutes, "total_sessions": 1}
+    if book_before:
+        book_after = {
+            **book_before,
+            "status": "currently_reading",
+            "total_minutes": book_before.get("total_minutes", 0) + actual_minutes,
+        }
+        stats_delta = merge_stats_deltas([stats_delta, book_stats_delta(book_before, book_after)])
+    await apply_user_stats(user["user_id"], stats_delta)
+    # After the writes land, so a concurrent reader can't tag old data with the new version
+    await bump_data_version(user["user_id"])
+    
+    return {"message": "Session completed", "minutes": actual_minutes, "streak": streak}
+
+def streak_update_pipeline(today: date) -> list:
+    """
+    Streak transition as an update pipeline: same day keeps the streak, the day after
+    last activity extends it, anything else restarts at 1; longest is the running max.
+    """
+    today_key = today.isoformat()
+    yesterday_key = (today - timedelta(days=1)).isoformat()
+    return [
+        {"$set": {
+            "current_streak": {"$switch": {
+                "branches": [
+                    {"case": {"$eq": ["$last_active_date", today_key]},
+                     "then": {"$ifNull": ["$current_streak", 0]}},
+                    {"case": {"$eq": ["$last_active_date", yesterday_key]},
+                     "then": {"$add": [{"$ifNull": ["$current_streak", 0]}, 1]}},
+                ],
+                "default": 1,
+            }},
+            "last_active_date": today_key,
+        }},
+        {"$set": {"longest_streak": {"$max": [{"$ifNull": ["$longest_streak", 0]}, "$current_streak"]}}},
+    ]
 
-@api_router.get("/sessions", response_model=List[Session])
-async def get_sessions(request: Request, session_token: Optional[str] = Cookie(None), book_id: Optional[str] = None, limit: int = 50):
-    """Get sessions for current user"""
+@api_router.get("/sessions", response_model=Union[List[Session], SessionPage])
+async def get_sessions(request: Request, response: Response, session_token: Optional[str] = Cookie(None), book_id: Optional[str] = None, limit: int = 50,
+                       paginate: bool = False, cursor: Optional[str] = None):
+    """Get sessions for current user — newest first; keyset page with ?paginate=true / ?cursor="""
     user = await get_current_user(request, session_token)
+    not_modified = await check_not_modified(request, response, user["user_id"])
+    if not_modified:
+        return not_modified
+    
+    if not (paginate or cursor):
+        return fast_response(request, response, await load_sessions(user["user_id"], book_id, limit))
     
     query = {"user_id": user["user_id"]}
     if book_id:
         query["book_id"] = book_id
     
-    sessions = await db.sessions.find(query, {"_id": 0}).sort("started_at", -1).to_list(min(limit, 1000))
-    
-    for session in sessions:
-        if isinstance(session.get("started_at"), str):
-            session["started_at"] = datetime.fromisoformat(session["started_at"])
-        if session.get("ended_at") and isinstance(session["ended_at"], str):
-            session["ended_at"] = datetime.fromisoformat(session["ended_at"])
+    sessions, next_cursor = await fetch_page(db.sessions, query, SESSION_PROJECTION, "started_at", "session_id", limit, cursor)
+    return fast_response(request, response, {"items": shape_documents(sessions, SESSION_DEFAULTS), "next_cursor": next_cursor})
+
+async def load_sessions(user_id: str, book_id: Optional[str] = None, limit: int = 50) -> list:
+    """Most recent sessions of a user in response shape, newest first (capped at 1000)"""
+    query = {"user_id": user_id}
+    if book_id:
+        query["book_id"] = book_id
     
-    return sessions
+    sessions = await db.sessions.find(query, SESSION_PROJECTION).sort("started_at", -1).to_list(min(limit, 1000))
+    return shape_documents(sessions, SESSION_DEFAULTS)
 
 # ==================== NOTE ROUTES ====================
 
+NOTE_PROJECTION = model_projection(Note)
+NOTE_DEFAULTS = model_defaults(Note)
+NOTE_BATCH_MAX = int(os.getenv('NOTE_BATCH_MAX', '100'))
+
 @api_router.post("/notes", response_model=Note)
 async def create_note(note_data: NoteCreate, request: Request, session_token: Optional[str] = Cookie(None)):
     """Create a note"""
     user = await get_current_user(request, session_token)
     
-    note_id = f"note_{uuid.uuid4().hex[:12]}"
-    new_note = {
-        "note_id": note_id,
+    new_note = new_note_doc(user["user_id"], note_data)
+    
+    # PERF: The note insert and the session counter don't depend on each other — run them together
+    await asyncio.gather(
+        db.notes.insert_one(new_note),
+        db.sessions.update_one(
+            {"session_id": note_data.session_id},
+            {"$inc": {"notes_count": 1}}
+        )
+    )
+    await bump_data_version(user["user_id"])
+    
+    return Note(**new_note)
+
+@api_router.post("/notes/batch", response_model=List[Note])
+async def create_notes_batch(batch: NoteBatchCreate, request: Request, session_token: Optional[str] = Cookie(None)):
+    """Create several notes at once (e.g. notes queued up during a session)"""
+    user = await get_current_user(request, session_token)
+    
+    if not batch.notes:
+        raise HTTPException(status_code=400, detail="No notes provided")
+    if len(batch.notes) > NOTE_BATCH_MAX:
+        raise HTTPException(status_code=400, detail=f"At most {NOTE_BATCH_MAX} notes per batch")
+    
+    new_notes = [new_note_doc(user["user_id"], note_data) for note_data in batch.notes]
+    
+    # One $inc per session, however many notes it got
+    per_session = Counter(note["session_id"] for note in new_notes)
+    
+    # PERF: One insert_many + one bulk_write instead of two round trips per note
+    await asyncio.gather(
+        db.notes.insert_many(new_notes),
+        db.sessions.bulk_write(
+            [UpdateOne({"session_id": session_id}, {"$inc": {"notes_count": count}})
+             for session_id, count in per_session.items()],
+            ordered=False
+        )
+    )
+    await bump_data_version(user["user_id"])
+    
+    return [Note(**note) for note in new_notes]
+
+def new_note_doc(user_id: str, note_data: NoteCreate) -> dict:
+    """Build the stored document for a new note (shared by single and batch create)."""
+    return {
+        "note_id": f"note_{uuid.uuid4().hex[:12]}",
         "session_id": note_data.session_id,
         "book_id": note_data.book_id,
-        "user_id": user["user_id"],
+        "user_id": user_id,
         "content": note_data.content,
         "created_at": datetime.now(timezone.utc)
     }
+
+@api_router.get("/notes", response_model=Union[List[Note], NotePage])
+async def get_notes(request: Request, response: Response, session_token: Optional[str] = Cookie(None), book_id: Optional[str] = None,
+                    paginate: bool = False, cursor: Optional[str] = None, limit: int = PAGE_DEFAULT_LIMIT):
+    """Get notes for current user — newest first; keyset page with ?paginate=true / ?cursor="""
+    user = await get_current_user(request, session_token)
+    not_modified = await check_not_modified(request, response, user["user_id"])
+    if not_modified:
+        return not_modified
     
-    await db.notes.insert_one(new_note)
+    query = {"user_id": user["user_id"]}
+    if book_id:
+        query["book_id"] = book_id
     
-    # Update session notes count
-    await db.sessions.update_one(
-        {"session_id": note_data.session_id},
-        {"$inc": {"notes_count": 1}}
-    )
+    next_cursor = None
+    if paginate or cursor:
+        notes, next_cursor = await fetch_page(db.notes, query, NOTE_PROJECTION, "created_at", "note_id", limit, cursor)
+    else:
+        notes = await db.notes.find(query, NOTE_PROJECTION).sort("created_at", -1).to_list(1000)
+    notes = shape_documents(notes, NOTE_DEFAULTS)
     
-    return Note(**new_note)
+    if paginate or cursor:
+        return fast_response(request, response, {"items": notes, "next_cursor": next_cursor})
+    return fast_response(request, response, notes)
 
-@api_router.get("/notes", response_model=List[Note])
-async def get_notes(request: Request, session_token: Optional[str] = Cookie(None), book_id: Optional[str] = None):
-    """Get notes for current user"""
+NOTE_SEARCH_SNIPPET_CHARS = 160
+NOTE_HIGHLIGHT_MIN_PREFIX = 3  # shortest term that also matches as a word prefix
+NOTE_SEARCH_MAX_OFFSET = 1000
+
+def note_search_terms(q: str) -> List[str]:
+    """Lowercased search words (phrase quotes and negated terms dropped) for highlighting"""
+    words = re.findall(r"-?\w+", q.lower())
+    return [w for w in words if not w.startswith("-")]
+
+def highlight_note(content: str, terms: List[str]) -> tuple:
+    """
+    Snippet around the first match plus [start, end) offsets of matched words.
+    The text index stems words, so a word matches when it shares a stem-length
+    prefix with a term ("reading" ~ "read") — close enough for highlighting.
+    Terms shorter than NOTE_HIGHLIGHT_MIN_PREFIX only match whole words, so "a"
+    or "is" don't light up every word that starts with them.
+    """
+    prefixes = [
+        term[:max(NOTE_HIGHLIGHT_MIN_PREFIX, len(term) - 3)]
+        for term in terms if len(term) >= NOTE_HIGHLIGHT_MIN_PREFIX
+    ]
+    whole_words = {term for term in terms if len(term) < NOTE_HIGHLIGHT_MIN_PREFIX}
+    spans = []
+    for match in re.finditer(r"\w+", content):
+        word = match.group().lower()
+        if word in whole_words or any(word.startswith(prefix) for prefix in prefixes):
+            spans.append((match.start(), match.end()))
+    
+    if len(content) <= NOTE_SEARCH_SNIPPET_CHARS:
+        return content, [list(span) for span in spans]
+    
+    first = spans[0][0] if spans else 0
+    start = max(0, min(first - NOTE_SEARCH_SNIPPET_CHARS // 4, len(content) - NOTE_SEARCH_SNIPPET_CHARS))
+    end = start + NOTE_SEARCH_SNIPPET_CHARS
+    snippet = ("…" if start else "") + content[start:end] + ("…" if end < len(content) else "")
+    shift = 1 if start else 0
+    return snippet, [[s - start + shift, e - start + shift] for s, e in spans if s >= start and e <= end]
+
+def encode_offset_cursor(offset: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps({"o": offset}).encode()).decode().rstrip("=")
+
+def decode_offset_cursor(cursor: str) -> int:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        offset = int(json.loads(base64.urlsafe_b64decode(padded))["o"])
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    if offset < 0 or offset > NOTE_SEARCH_MAX_OFFSET:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return offset
+
+@api_router.get("/notes/search", response_model=NoteSearchPage)
+async def search_notes(request: Request, response: Response, q: str, session_token: Optional[str] = Cookie(None),
+                       book_id: Optional[str] = None, cursor: Optional[str] = None, limit: int = 20):
+    """Full-text search over the current user's notes — best match first"""
     user = await get_current_user(request, session_token)
     
-    query = {"user_id": user["user_id"]}
+    q = q.strip()
+    if not q:
+        raise HTTPException(status_code=400, detail="Search query is required")
+    
+    not_modified = await check_not_modified(request, response, user["user_id"], f"search:{q}:{book_id}:{cursor}:{limit}")
+    if not_modified:
+        return not_modified
+    
+    limit = max(1, min(limit, PAGE_MAX_LIMIT))
+    offset = decode_offset_cursor(cursor) if cursor else 0
+    
+    # Equality on user_id is required by the (user_id, text) index, and scopes the search
+    query = {"user_id": user["user_id"], "$text": {"$search": q}}
     if book_id:
         query["book_id"] = book_id
     
-    notes = await db.notes.find(query, {"_id": 0}).sort("created_at", -1).to_list(1000)
+    # Relevance order isn't keyset-friendly, so pages are offsets (bounded by NOTE_SEARCH_MAX_OFFSET)
+    projection = {**NOTE_PROJECTION, "score": {"$meta": "textScore"}}
+    notes = await db.notes.find(query, projection).sort(
+        [("score", {"$meta": "textScore"}), ("created_at", -1), ("note_id", -1)]
+    ).skip(offset).limit(limit + 1).to_list(limit + 1)
     
-    for note in notes:
-        if isinstance(note.get("created_at"), str):
-            note["created_at"] = datetime.fromisoformat(note["created_at"])
+    next_cursor = None
+    if len(notes) > limit:
+        notes = notes[:limit]
+        if offset + limit <= NOTE_SEARCH_MAX_OFFSET:
+            next_cursor = encode_offset_cursor(offset + limit)
     
-    return notes
+    terms = note_search_terms(q)
+    items = []
+    for note in shape_documents(notes, NOTE_DEFAULTS):
+        snippet, highlights = highlight_note(note["content"], terms)
+        items.append({**note, "score": round(note["score"], 4), "snippet": snippet, "highlights": highlights})
+    
+    return fast_response(request, response, {"items": items, "next_cursor": next_cursor})
 
 # ==================== STREAK ROUTES ====================
 
 @api_router.get("/streak", response_model=Streak)
-async def get_streak(request: Request, session_token: Optional[str] = Cookie(None)):
+async def get_streak(request: Request, response: Response, session_token: Optional[str] = Cookie(None)):
     """Get user's reading streak"""
     user = await get_current_user(request, session_token)
-    
-    streak = await db.streaks.find_one({"user_id": user["user_id"]}, {"_id": 0})
+    not_modified = await check_not_modified(request, response, user["user_id"])
+    if not_modified:
+        return not_modified
+    return await load_streak(user["user_id"])
+
+async def load_streak(user_id: str) -> Streak:
+    """A user's streak, initialized on first read"""
+    streak = await db.streaks.find_one({"user_id": user_id}, {"_id": 0})
     
     if not streak:
         # Initialize if doesn't exist
         new_streak = {
-            "user_id": user["user_id"],
+            "user_id": user_id,
             "current_streak": 0,
             "longest_streak": 0,
             "last_active_date": None
@@ -896,85 +1967,389 @@ async def get_streak(request: Request, session_token: Optional[str] = Cookie(Non
 
 # ==================== CALENDAR ROUTES ====================
 
+def calendar_minutes(actual_minutes: int, planned_minutes: int) -> int:
+    """Minutes a finished session contributes to the calendar — capped at the planned
+    duration so server time drift (e.g. a sleeping instance) doesn't over-report."""
+    return max(1, min(actual_minutes, planned_minutes))
+
+# "rollup" reads daily_activity; "sessions" aggregates raw sessions server-side.
+# Default "auto": sessions until the backfill migration has run, then rollup.
+CALENDAR_SOURCE = os.getenv('CALENDAR_SOURCE', 'auto').strip().lower()
+
+def calendar_source() -> str:
+    if CALENDAR_SOURCE in ("rollup", "sessions"):
+        return CALENDAR_SOURCE
+    # Rollups only cover pre-deploy history once migration 2 has backfilled them
+    return "rollup" if _schema_version >= DAILY_ACTIVITY_SCHEMA_VERSION else "sessions"
+
+def calendar_range(year: Optional[int], month: Optional[int]):
+    """[start, end) UTC bounds for a calendar query, or (None, None) for the whole history."""
+    if year is None and month is None:
+        return None, None
+    if month is not None and not 1 <= month <= 12:
+        raise HTTPException(status_code=400, detail="month must be between 1 and 12")
+    # 9998 so the exclusive end bound (next year/month) still fits in a datetime
+    if year is not None and not 1 <= year <= 9998:
+        raise HTTPException(status_code=400, detail="year must be between 1 and 9998")
+    if year is None:
+        year = datetime.now(timezone.utc).year
+    if month is None:
+        return datetime(year, 1, 1, tzinfo=timezone.utc), datetime(year + 1, 1, 1, tzinfo=timezone.utc)
+    start = datetime(year, month, 1, tzinfo=timezone.utc)
+    end = datetime(year + (month == 12), month % 12 + 1, 1, tzinfo=timezone.utc)
+    return start, end
+
 @api_router.get("/calendar")
-async def get_calendar(request: Request, session_token: Optional[str] = Cookie(None), year: int = None, month: int = None):
-    """Get reading activity calendar"""
+async def get_calendar(request: Request, response: Response, session_token: Optional[str] = Cookie(None), year: int = None, month: int = None):
+    """Get reading activity calendar, optionally limited to a year or a month"""
     user = await get_current_user(request, session_token)
+    start, end = calendar_range(year, month)
+    # Keyed by the resolved range: `?month=N` means the current year, which changes at New Year
+    variant = start.isoformat() if start else ""
+    not_modified = await check_not_modified(request, response, user["user_id"], variant=variant)
+    if not_modified:
+        return not_modified
+    return await load_calendar(user["user_id"], start, end)
+
+async def load_calendar(user_id: str, start: Optional[datetime] = None, end: Optional[datetime] = None) -> dict:
+    """Per-day {sessions, minutes} for a user, optionally within [start, end)"""
+    if calendar_source() == "sessions":
+        # PERF: Index-backed range $match on (user_id, started_at) + $group — Python only
+        # receives one row per day, never the raw session list
+        match = {"user_id": user_id, "ended_at": {"$ne": None}}
+        if start:
+            match["started_at"] = {"$gte": start, "$lt": end}
+        activity = await db.sessions.aggregate(daily_activity_pipeline(match)).to_list(None)
+    else:
+        # PERF: One small pre-aggregated document per active day (maintained by complete_session,
+        # backfilled by `python manage.py backfill-daily-activity`) instead of re-aggregating sessions
+        query = {"user_id": user_id}
+        if start:
+            query["date"] = {"$gte": start.date().isoformat(), "$lt": end.date().isoformat()}
+        activity = await db.daily_activity.find(
+            query,
+            {"_id": 0, "date": 1, "sessions": 1, "minutes": 1}
+        ).to_list(None)
     
-    # Get all completed sessions
-    sessions = await db.sessions.find(
-        {"user_id": user["user_id"], "ended_at": {"$ne": None}},
-        {"_id": 0, "started_at": 1, "ended_at": 1, "duration_minutes": 1, "actual_minutes": 1}
-    ).to_list(10000)
-    
-    # Aggregate by date
-    calendar_data = {}
-    for session in sessions:
-        started_at = session.get("started_at")
-        ended_at = session.get("ended_at")
-        
-        if isinstance(started_at, str):
-            started_at = datetime.fromisoformat(started_at)
-        if isinstance(ended_at, str):
-            ended_at = datetime.fromisoformat(ended_at)
-        
-        date_key = started_at.date().isoformat()
-        
-        if date_key not in calendar_data:
-            calendar_data[date_key] = {"sessions": 0, "minutes": 0}
-        
-        calendar_data[date_key]["sessions"] += 1
-        
-        # Calculate minutes spent from timestamps (most accurate)
-        if started_at and ended_at:
-            delta = ended_at - started_at
-            # Use actual_minutes field if it exists, otherwise use calculated delta
-            # Cap it at duration_minutes + 5 to avoid outliers if server was sleeping
-            calc_minutes = round(delta.total_seconds() / 60)
-            session_total = session.get("actual_minutes", calc_minutes)
-            
-            # Capping logic to ensure we don't over-report due to server time drift
-            planned = session.get("duration_minutes", 30)
-            actual = min(session_total, planned)
-            
-            calendar_data[date_key]["minutes"] += max(1, actual)
-        else:
-            calendar_data[date_key]["minutes"] += session.get("duration_minutes", 0)
-    
-    return calendar_data
+    return {
+        day["date"]: {"sessions": day["sessions"], "minutes": day["minutes"]}
+        for day in sorted(activity, key=lambda d: d["date"])
+    }
+
+# ==================== DASHBOARD ROUTES ====================
+
+@api_router.get("/dashboard", response_model=DashboardData)
+async def get_dashboard(request: Request, response: Response, session_token: Optional[str] = Cookie(None), include: str = ""):
+    """
+    Everything the dashboard needs in one round trip: authenticates once and runs the
+    books / sessions / streak queries concurrently. `include` may add `calendar`
+    (current month) and/or `chat_usage`, comma-separated.
+    """
+    user = await get_current_user(request, session_token)
+    uid = user["user_id"]
+    extras = {part.strip() for part in include.split(",") if part.strip()}
+    
+    # chat_usage changes without data mutations (rate-limit windows), so it can't be revalidated
+    if "chat_usage" not in extras:
+        month = datetime.now(timezone.utc).strftime("%Y-%m") if "calendar" in extras else ""
+        not_modified = await check_not_modified(request, response, uid, variant=month)
+        if not_modified:
+            return not_modified
+    
+    queries = [load_books(uid), load_sessions(uid), load_streak(uid)]
+    if "calendar" in extras:
+        now = datetime.now(timezone.utc)
+        queries.append(load_calendar(uid, *calendar_range(now.year, now.month)))
+    if "chat_usage" in extras:
+        queries.append(chat_rate_limiter.usage(uid))
+    
+    books, sessions, streak, *rest = await asyncio.gather(*queries)
+    
+    dashboard = {"books": books, "sessions": sessions, "streak": streak.model_dump()}
+    if "calendar" in extras:
+        dashboard["calendar"] = rest.pop(0)
+    if "chat_usage" in extras:
+        dashboard["chat_usage"] = rest.pop(0)
+    return fast_response(request, response, dashboard)
+
+# ==================== ANALYTICS ROUTES ====================
+# PERF: user_stats holds running totals per user (one document, _id = user_id), kept in
+# step by the book/session write paths with $inc deltas, so analytics is a point read
+# instead of scanning every book and session. Migration 3 seeds it from existing data
+# (`python manage.py rebuild-user-stats` re-runs that if it ever drifts); a document
+# without rebuilt_at only holds deltas, so analytics rebuilds that user before reading.
+#   total_minutes / total_sessions — finished sessions (kept when a book is deleted)
+#   books_by_status / minutes_by_genre — the books currently in the library
+
+BOOK_STATS_PROJECTION = {"_id": 0, "status": 1, "genre": 1, "total_minutes": 1}
+
+def stats_label(key: str) -> str:
+    return key.replace("\uff0e", ".").replace("\uff04", "$")
+
+def book_stats_delta(before: Optional[dict], after: Optional[dict]) -> dict:
+    """$inc delta on user_stats for a book going from `before` to `after` (None = absent)"""
+    delta = defaultdict(int)
+    for book, sign in ((before, -1), (after, 1)):
+        if not book:
+            continue
+        delta["books_total"] += sign
+        delta[f"books_by_status.{stats_key(book.get('status') or 'want_to_read')}"] += sign
+        delta[f"minutes_by_genre.{stats_key(book.get('genre') or 'General')}"] += sign * book.get("total_minutes", 0)
+    return {field: amount for field, amount in delta.items() if amount}
+
+def merge_stats_deltas(deltas) -> dict:
+    merged = defaultdict(int)
+    for delta in deltas:
+        for field, amount in delta.items():
+            merged[field] += amount
+    return {field: amount for field, amount in merged.items() if amount}
+
+async def apply_user_stats(user_id: str, delta: dict):
+    if delta:
+        await db.user_stats.update_one(
+            {"_id": user_id},
+            {"$inc": delta, "$set": {"updated_at": datetime.now(timezone.utc)}},
+            upsert=True
+        )
+
+@api_router.get("/analytics", response_model=UserAnalytics)
+async def get_analytics(request: Request, response: Response, session_token: Optional[str] = Cookie(None)):
+    """Reading totals and today's progress toward the daily goal"""
+    user = await get_current_user(request, session_token)
+    today = datetime.now(timezone.utc).date().isoformat()
+    daily_goal = user.get("daily_goal_minutes") or 30
+    # The goal lives on the user doc (onboarding doesn't bump the data version), so it keys the ETag too
+    not_modified = await check_not_modified(request, response, user["user_id"], variant=f"{today}:{daily_goal}")
+    if not_modified:
+        return not_modified
+    
+    stats, activity = await asyncio.gather(
+        db.user_stats.find_one({"_id": user["user_id"]}),
+        db.daily_activity.find_one({"user_id": user["user_id"], "date": today}, {"_id": 0, "minutes": 1})
+    )
+    if not stats or "rebuilt_at" not in stats:
+        # Missing or delta-only (e.g. books that predate the counters) — recompute this user first
+        await rebuild_user_stats(db, user["user_id"])
+        stats = await db.user_stats.find_one({"_id": user["user_id"]}) or {}
+    
+    total_sessions = stats.get("total_sessions", 0)
+    books_by_status = {stats_label(k): v for k, v in stats.get("books_by_status", {}).items() if v}
+    today_minutes = activity["minutes"] if activity else 0
+    
+    return UserAnalytics(
+        total_minutes=stats.get("total_minutes", 0),
+        total_sessions=total_sessions,
+        average_session_minutes=round(stats.get("total_minutes", 0) / total_sessions, 1) if total_sessions else 0,
+        books_total=stats.get("books_total", 0),
+        books_completed=books_by_status.get("completed", 0),
+        books_by_status=books_by_status,
+        minutes_by_genre={stats_label(k): v for k, v in stats.get("minutes_by_genre", {}).items() if v},
+        daily_goal_minutes=daily_goal,
+        today_minutes=today_minutes,
+        daily_goal_progress=min(1.0, round(today_minutes / daily_goal, 3)),
+    )
 
 # ==================== CHAT / BOOK COMPANION ROUTES ====================
 
-# Helper to get/init Gemini client
+class GeminiClientHolder:
+    """
+    Long-lived Gemini client. Built once and reused (keeping its HTTP connection pool);
+    rebuilt only when GEMINI_API_KEY actually changes. A key set in the process
+    environment wins; otherwise the .env file is the source, watched by mtime and
+    checked at most every ENV_CHECK_INTERVAL seconds.
+    """
+
+    ENV_CHECK_INTERVAL = 5.0
+    PLACEHOLDER_KEY = 'your-gemini-api-key-here'
+
+    def __init__(self, env_path: Path):
+        self.env_path = env_path
+        self._client = None
+        self._key: Optional[str] = None
+        self._env_mtime: Optional[float] = None
+        self._checked_at: Optional[float] = None
+
+    def _env_file_mtime(self) -> Optional[float]:
+        try:
+            return self.env_path.stat().st_mtime
+        except OSError:
+            return None
+
+    def _configured_key(self) -> str:
+        # Process env first; .env is the fallback and is re-read on edits. os.environ itself
+        # can't serve as the fallback — load_dotenv froze the boot-time .env value into it.
+        key = PROCESS_GEMINI_API_KEY
+        if not key and self._env_mtime is not None:
+            key = dotenv_values(self.env_path).get('GEMINI_API_KEY')
+        return (key or '').strip().strip("'").strip('"')
+
+    def get(self):
+        now = time.monotonic()
+        if self._checked_at is not None and now - self._checked_at < self.ENV_CHECK_INTERVAL:
+            return self._client
+        first_check = self._checked_at is None
+        self._checked_at = now
+
+        mtime = self._env_file_mtime()
+        if not first_check and mtime == self._env_mtime:
+            return self._client
+        self._env_mtime = mtime
+
+        key = self._configured_key()
+        if first_check or key != self._key:
+            self._key = key
+            self._client = (
+                lazy_import("google.genai").Client(api_key=key) if key and key != self.PLACEHOLDER_KEY else None
+            )
+            if not first_check:
+                logger.info("🔑 GEMINI_API_KEY changed — Gemini client rebuilt.")
+        return self._client
+
+_gemini_holder = GeminiClientHolder(ROOT_DIR / '.env')
+
 def get_gemini_client():
-    key = os.environ.get('GEMINI_API_KEY', '').strip().strip("'").strip('"')
-    if not key or key == 'your-gemini-api-key-here':
-        return None
-    return genai.Client(api_key=key)
+    return _gemini_holder.get()
+
+# PERF: The chat stack (~1s of imports) is loaded in a worker thread — right after startup
+# unless PRELOAD_AI_STACK=false, and at the latest by the first chat — never on the event loop
+AI_STACK_MODULES = ("google.genai", "google.genai.types", "langfuse")
+PRELOAD_AI_STACK = os.getenv('PRELOAD_AI_STACK', 'true').strip().lower() in ('1', 'true', 'yes')
+_ai_stack_task: Optional[asyncio.Task] = None  # module-level strong ref
+
+def _import_ai_stack():
+    for name in AI_STACK_MODULES:
+        try:
+            lazy_import(name)
+        except ImportError as e:
+            logging.warning(f"⚠️  {name} unavailable: {e}")
 
-gemini_client = get_gemini_client()
+def ensure_ai_stack() -> asyncio.Task:
+    """Start (once) the threaded import of the chat stack; await the task before using it."""
+    global _ai_stack_task
+    if _ai_stack_task is None:
+        _ai_stack_task = asyncio.create_task(asyncio.to_thread(_import_ai_stack))
+    return _ai_stack_task
 
 # --- Chat Guardrails ---
 
-# Per-user rate limiting (in-memory)
-_chat_rate_limit = defaultdict(list)  # user_id -> [timestamps]
 CHAT_RATE_LIMIT = 45       # max requests (approx 9 RPM, well under Gemini's 15 RPM)
 CHAT_RATE_WINDOW = 300     # per 5 minutes
 MAX_HISTORY = 20           # cap conversation history
 MAX_QUESTION_LENGTH = 500  # max user input length
 
-def check_chat_rate_limit(user_id: str):
-    """Simple sliding-window rate limiter for the chat endpoint."""
-    now = time.time()
-    _chat_rate_limit[user_id] = [
-        t for t in _chat_rate_limit[user_id] if now - t < CHAT_RATE_WINDOW
-    ]
-    if len(_chat_rate_limit[user_id]) >= CHAT_RATE_LIMIT:
+# "mongo" shares counters across all uvicorn workers; "memory" is per-process (dev / single worker)
+RATE_LIMIT_BACKEND = os.getenv('RATE_LIMIT_BACKEND', 'mongo').strip().lower()
+
+class MemoryCounterStore:
+    """Per-process window counters. Windows older than the previous one are swept periodically."""
+
+    SWEEP_EVERY = 1000  # increments between idle-key sweeps
+
+    def __init__(self):
+        self._counts: Dict[tuple, int] = {}  # (key, window_index) -> count
+        self._ops = 0
+
+    async def incr(self, key: str, window: int, delta: int, expires_at: datetime) -> int:
+        self._ops += 1
+        if self._ops % self.SWEEP_EVERY == 0:
+            self._counts = {k: v for k, v in self._counts.items() if k[1] >= window - 1}
+        count = self._counts.get((key, window), 0) + delta
+        self._counts[(key, window)] = count
+        return count
+
+    async def get(self, key: str, window: int) -> int:
+        return self._counts.get((key, window), 0)
+
+class MongoCounterStore:
+    """Window counters in a shared collection; idle keys are removed by a TTL index on expires_at."""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    async def incr(self, key: str, window: int, delta: int, expires_at: datetime) -> int:
+        doc = await self.collection.find_one_and_update(
+            {"_id": f"{key}:{window}"},
+            {"$inc": {"count": delta}, "$setOnInsert": {"expires_at": expires_at}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc["count"]
+
+    async def get(self, key: str, window: int) -> int:
+        doc = await self.collection.find_one({"_id": f"{key}:{window}"}, {"count": 1})
+        return doc["count"] if doc else 0
+
+class SlidingWindowRateLimiter:
+    """
+    Sliding-window-counter limiter: O(1) state per key (current + previous fixed window).
+    The previous window's count is weighted by how much of it still overlaps the sliding window.
+    """
+
+    def __init__(self, name: str, limit: int, window_seconds: int, store):
+        self.name = name
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.store = store
+
+    def _position(self, now: float):
+        window = int(now // self.window_seconds)
+        elapsed = now - window * self.window_seconds
+        return window, elapsed
+
+    def _state(self, used: float, elapsed: float) -> dict:
+        used = min(self.limit, int(-(-used // 1)))  # ceil, clamped
+        return {
+            "used": used,
+            "limit": self.limit,
+            "remaining": max(0, self.limit - used),
+            "window_seconds": self.window_seconds,
+            "resets_in_seconds": int(self.window_seconds - elapsed) if used else 0,
+        }
+
+    async def _estimate(self, key: str, window: int, elapsed: float) -> float:
+        previous, current = await asyncio.gather(
+            self.store.get(key, window - 1), self.store.get(key, window)
+        )
+        return previous * (1 - elapsed / self.window_seconds) + current
+
+    async def hit(self, key: str) -> tuple:
+        """Count one request; returns (allowed, state). Rejected hits are rolled back."""
+        key = f"{self.name}:{key}"
+        window, elapsed = self._position(time.time())
+        expires_at = datetime.fromtimestamp((window + 2) * self.window_seconds, tz=timezone.utc)
+        current, previous = await asyncio.gather(
+            self.store.incr(key, window, 1, expires_at), self.store.get(key, window - 1)
+        )
+        used = previous * (1 - elapsed / self.window_seconds) + current
+        if used > self.limit:
+            await self.store.incr(key, window, -1, expires_at)
+            return False, self._state(used - 1, elapsed)
+        return True, self._state(used, elapsed)
+
+    async def usage(self, key: str) -> dict:
+        window, elapsed = self._position(time.time())
+        used = await self._estimate(f"{self.name}:{key}", window, elapsed)
+        return self._state(used, elapsed)
+
+chat_rate_limiter = SlidingWindowRateLimiter(
+    "chat",
+    CHAT_RATE_LIMIT,
+    CHAT_RATE_WINDOW,
+    MongoCounterStore(db.rate_limits) if db is not None and RATE_LIMIT_BACKEND == "mongo" else MemoryCounterStore(),
+)
+
+async def check_chat_rate_limit(user_id: str):
+    """Shared sliding-window rate limit for the chat endpoint (fails open if the store is down)."""
+    try:
+        allowed, _ = await chat_rate_limiter.hit(user_id)
+    except Exception as e:
+        logging.warning(f"Chat rate limiter unavailable, allowing request: {e}")
+        return
+    if not allowed:
         raise HTTPException(
             status_code=429,
             detail="You've sent too many messages. Please wait a few minutes."
         )
-    _chat_rate_limit[user_id].append(now)
 
 def is_post_cutoff_book(book: dict) -> bool:
     """Heuristic: flag books published after the model's training cutoff (2024+)."""
@@ -987,115 +2362,197 @@ def is_post_cutoff_book(book: dict) -> bool:
     except (ValueError, IndexError):
         return False
 
-@observe()
-async def fetch_book_context(book: dict) -> str:
+def _format_book_context(info: dict) -> str:
+    desc = info.get("description", "")
+    if desc:
+        desc = re.sub('<[^<]+?>', '', desc)  # strip HTML
+
+    context_parts = []
+    if desc:
+        context_parts.append(f"Full Description: {desc[:2000]}")
+    if info.get("categories"):
+        context_parts.append(f"Categories: {', '.join(info['categories'])}")
+    if info.get("publishedDate"):
+        context_parts.append(f"Published: {info['publishedDate']}")
+    if info.get("publisher"):
+        context_parts.append(f"Publisher: {info['publisher']}")
+    if info.get("pageCount"):
+        context_parts.append(f"Pages: {info['pageCount']}")
+    return "\n".join(context_parts)
+
+@lazy_observe()
+async def fetch_book_context(book: dict) -> Optional[str]:
     """
     Fetch extended metadata from Google Books API to inject as grounding context.
-    Only called for books flagged as potentially unknown.
-    PERF: Now async — no event loop blocking.
+    Books without a google_books_id are resolved by a title/author search.
+    Returns "" when Google has nothing for the book, None on a transient failure.
     """
     google_id = book.get("google_books_id")
-    if not google_id:
-        return ""
+    params = {}
+    google_books_key = os.environ.get('GOOGLE_BOOKS_API_KEY', '')
+    if google_books_key:
+        params["key"] = google_books_key
     try:
-        url = f"https://www.googleapis.com/books/v1/volumes/{google_id}"
-        params = {}
-        google_books_key = os.environ.get('GOOGLE_BOOKS_API_KEY', '')
-        if google_books_key:
-            params["key"] = google_books_key
+        if google_id:
+            url = f"{GOOGLE_BOOKS_API_URL}/{google_id}"
+        else:
+            url = GOOGLE_BOOKS_API_URL
+            query = f'intitle:"{book.get("title", "")}"'
+            if book.get("author"):
+                query += f' inauthor:"{book["author"]}"'
+            params.update({"q": query, "maxResults": 1})
             
-        async with httpx.AsyncClient() as http_client:
-            resp = await http_client.get(url, params=params, timeout=10)
-        if resp.status_code != 200:
+        resp = await get_http_client().get(url, params=params, timeout=http_timeout_for(url))
+        if resp.status_code == 404:
             return ""
+        if resp.status_code != 200:
+            return None
         data = resp.json()
-        info = data.get("volumeInfo", {})
-
-        desc = info.get("description", "")
-        if desc:
-            desc = re.sub('<[^<]+?>', '', desc)  # strip HTML
-
-        context_parts = []
-        if desc:
-            context_parts.append(f"Full Description: {desc[:2000]}")
-        if info.get("categories"):
-            context_parts.append(f"Categories: {', '.join(info['categories'])}")
-        if info.get("publishedDate"):
-            context_parts.append(f"Published: {info['publishedDate']}")
-        if info.get("publisher"):
-            context_parts.append(f"Publisher: {info['publisher']}")
-        if info.get("pageCount"):
-            context_parts.append(f"Pages: {info['pageCount']}")
-        return "\n".join(context_parts)
+        if not google_id:
+            items = data.get("items") or []
+            data = items[0] if items else {}
+        return _format_book_context(data.get("volumeInfo", {}))
     except Exception:
+        return None
+
+# PERF: Grounding context is persisted on the book record and in a shared book_context
+# catalog (keyed by volume, or by normalized title/author), so only the first chat turn
+# for a volume — across all users — pays the Google Books round trip.
+BOOK_CONTEXT_REFRESH_DAYS = int(os.getenv('BOOK_CONTEXT_REFRESH_DAYS', '30'))
+BOOK_CONTEXT_EMPTY_RETRY_HOURS = int(os.getenv('BOOK_CONTEXT_EMPTY_RETRY_HOURS', '24'))
+
+def book_context_key(book: dict) -> Optional[str]:
+    if book.get("google_books_id"):
+        return f"volume:{book['google_books_id']}"
+    title = normalize_search_query(book.get("title") or "")
+    if not title:
+        return None
+    return f"title:{title}|{normalize_search_query(book.get('author') or '')}"
+
+def _book_context_is_fresh(entry: Optional[dict], key: str) -> bool:
+    if not entry or entry.get("key") != key or not entry.get("fetched_at"):
+        return False
+    fetched_at = entry["fetched_at"]
+    if fetched_at.tzinfo is None:
+        fetched_at = fetched_at.replace(tzinfo=timezone.utc)
+    # Empty results are retried sooner — Google may add the volume later
+    max_age = (
+        timedelta(days=BOOK_CONTEXT_REFRESH_DAYS) if entry.get("text")
+        else timedelta(hours=BOOK_CONTEXT_EMPTY_RETRY_HOURS)
+    )
+    return datetime.now(timezone.utc) - fetched_at < max_age
+
+async def get_book_context(book: dict) -> str:
+    """Grounding context for a book: book record -> shared catalog -> Google Books."""
+    key = book_context_key(book)
+    if not key:
         return ""
+    entry = book.get("grounding_context")
+    if _book_context_is_fresh(entry, key):
+        return entry["text"]
+
+    catalog = await db.book_context.find_one({"_id": key}, {"_id": 0})
+    if catalog:
+        catalog["key"] = key
+    if not _book_context_is_fresh(catalog, key):
+        text = await fetch_book_context(book)
+        if text is None:
+            return ""  # transient failure — don't persist, retry next turn
+        catalog = {"key": key, "text": text, "fetched_at": datetime.now(timezone.utc)}
+        await db.book_context.replace_one(
+            {"_id": key}, {"text": text, "fetched_at": catalog["fetched_at"]}, upsert=True
+        )
 
-# Chat safety settings — permissive for literary discussion
-CHAT_SAFETY_SETTINGS = [
-    types.SafetySetting(
-        category="HARM_CATEGORY_HATE_SPEECH",
-        threshold="BLOCK_ONLY_HIGH",
-    ),
-    types.SafetySetting(
-        category="HARM_CATEGORY_HARASSMENT",
-        threshold="BLOCK_ONLY_HIGH",
-    ),
-    types.SafetySetting(
-        category="HARM_CATEGORY_SEXUALLY_EXPLICIT",
-        threshold="BLOCK_ONLY_HIGH",
-    ),
-    types.SafetySetting(
-        category="HARM_CATEGORY_DANGEROUS_CONTENT",
-        threshold="BLOCK_ONLY_HIGH",
-    ),
+    await db.books.update_one(
+        {"book_id": book["book_id"]},
+        {"$set": {"grounding_context": catalog}}
+    )
+    return catalog["text"]
+
+# PERF: Opt-in shared answer cache for first questions about a volume ("Who is X?").
+# Only history-free questions on books with a google_books_id are cached, keyed by
+# (volume, hash of the prompt's book fields, normalized question, spoiler flag). The
+# fields are user-editable, so one reader's edits only ever share answers with readers
+# whose prompt is identical. Hits replay over the same SSE framing.
+CHAT_ANSWER_CACHE_ENABLED = os.getenv('CHAT_ANSWER_CACHE_ENABLED', 'false').strip().lower() in ('1', 'true', 'yes')
+CHAT_ANSWER_CACHE_TTL = float(os.getenv('CHAT_ANSWER_CACHE_TTL_SECONDS', '86400'))
+CHAT_ANSWER_CACHE_MAX_ENTRIES = int(os.getenv('CHAT_ANSWER_CACHE_MAX_ENTRIES', '1000'))
+_chat_answer_cache = TTLCache(CHAT_ANSWER_CACHE_MAX_ENTRIES, CHAT_ANSWER_CACHE_TTL)
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "Connection": "keep-alive",
+    "X-Accel-Buffering": "no",
+}
+
+def chat_answer_cache_key(book: dict, question: str, spoiler_unlocked: bool, history: list) -> Optional[str]:
+    if not CHAT_ANSWER_CACHE_ENABLED or history or not book.get("google_books_id"):
+        return None
+    normalized = normalize_search_query(question).rstrip("?!. ")
+    if not normalized:
+        return None
+    # Everything from the book that reaches the system prompt (or toggles search grounding)
+    prompt_inputs = json.dumps(
+        [book.get(field) for field in ("title", "author", "genre", "description", "published_date")]
+    )
+    prompt_hash = hashlib.sha1(prompt_inputs.encode()).hexdigest()[:16]
+    return f"{book['google_books_id']}|{prompt_hash}|{int(spoiler_unlocked)}|{normalized}"
+
+async def replay_cached_answer(answer: str, trace_id: Optional[str]):
+    """Replay a cached answer with the same SSE events generate_stream emits."""
+    if trace_id:
+        yield f"data: {json.dumps({'trace_id': trace_id})}\n\n"
+    yield f"data: {json.dumps({'text': answer})}\n\n"
+    yield f"data: {json.dumps({'done': True})}\n\n"
+
+# Chat safety settings — permissive for literary discussion (built on first chat, with google.genai)
+CHAT_SAFETY_CATEGORIES = [
+    "HARM_CATEGORY_HATE_SPEECH",
+    "HARM_CATEGORY_HARASSMENT",
+    "HARM_CATEGORY_SEXUALLY_EXPLICIT",
+    "HARM_CATEGORY_DANGEROUS_CONTENT",
 ]
 
+@functools.lru_cache(maxsize=1)
+def chat_safety_settings() -> list:
+    types = lazy_import("google.genai.types")
+    return [types.SafetySetting(category=category, threshold="BLOCK_ONLY_HIGH") for category in CHAT_SAFETY_CATEGORIES]
+
 @api_router.get("/chat/usage")
 async def get_chat_usage(request: Request, session_token: Optional[str] = Cookie(None)):
     """Return current chat rate-limit usage for the authenticated user."""
     user = await get_current_user(request, session_token)
-    uid = user["user_id"]
-    now = time.time()
-    timestamps = [t for t in _chat_rate_limit.get(uid, []) if now - t < CHAT_RATE_WINDOW]
-    used = len(timestamps)
-    oldest = min(timestamps) if timestamps else now
-    resets_in = max(0, int(CHAT_RATE_WINDOW - (now - oldest))) if timestamps else 0
-    return {
-        "used": used,
-        "limit": CHAT_RATE_LIMIT,
-        "remaining": CHAT_RATE_LIMIT - used,
-        "window_seconds": CHAT_RATE_WINDOW,
-        "resets_in_seconds": resets_in,
-    }
+    return await chat_rate_limiter.usage(user["user_id"])
 
 @api_router.post("/chat")
-@observe(capture_output=False)
+@lazy_observe(capture_output=False)
 async def chat_with_book(chat_req: ChatRequest, request: Request, session_token: Optional[str] = Cookie(None)):
     """AI-powered book companion chat — streams responses via SSE"""
     user = await get_current_user(request, session_token)
     uid = user["user_id"]
     
     # Attach metadata to the Langfuse trace (SDK v3)
-    langfuse_client = get_client()
+    langfuse = langfuse_client()
     
     # Extract trace ID synchronously before async generator context is lost in streaming response
-    active_trace_id = langfuse_client.get_current_trace_id() if langfuse_client else None
+    active_trace_id = langfuse.get_current_trace_id() if langfuse else None
     
-    # Ensure client is fresh (picks up .env changes)
-    global gemini_client
+    # google.genai is imported off the event loop (no-op once the preload has finished)
+    await ensure_ai_stack()
+    
+    # PERF: Reused client — only rebuilt when the configured key changes
     gemini_client = get_gemini_client()
     
     if not gemini_client:
         raise HTTPException(status_code=503, detail="AI chat not configured. Please set GEMINI_API_KEY in .env")
 
     # --- Guardrail: Per-user rate limiting ---
-    check_chat_rate_limit(user["user_id"])
+    await check_chat_rate_limit(user["user_id"])
 
     # --- Guardrail: Input sanitization ---
     # Attach metadata to the Langfuse trace (SDK v3)
-    langfuse_client = get_client()
-    if langfuse_client:
-        langfuse_client.update_current_trace(
+    if langfuse:
+        langfuse.update_current_trace(
             name="Chat with Book",
             session_id=chat_req.book_id,
             user_id=user["user_id"],
@@ -1117,6 +2574,16 @@ async def chat_with_book(chat_req: ChatRequest, request: Request, session_token:
     # --- Guardrail: Read spoiler toggle state ---
     spoiler_unlocked = chat_req.spoiler_unlocked
 
+    answer_key = chat_answer_cache_key(book, question, spoiler_unlocked, chat_req.history)
+    if answer_key:
+        cached_answer = _chat_answer_cache.get(answer_key)
+        if cached_answer is not None:
+            return StreamingResponse(
+                replay_cached_answer(cached_answer, active_trace_id),
+                media_type="text/event-stream",
+                headers=SSE_HEADERS
+            )
+
     # --- Build hardened system prompt ---
     spoiler_rule = (
         'OFF — the user has unlocked spoilers via the UI toggle. You may discuss the full plot freely, '
@@ -1180,8 +2647,8 @@ async def chat_with_book(chat_req: ChatRequest, request: Request, session_token:
             'Be extra cautious. Preface answers with "Based on what I know..." '
             'and recommend the user verify details in their copy.'
         )
-        # Long Context Injection — fetch rich metadata from Google Books
-        extra_context = await fetch_book_context(book)
+        # Long Context Injection — rich metadata from Google Books (persisted after first fetch)
+        extra_context = await get_book_context(book)
         if extra_context:
             system_prompt += (
                 f'\n\nVERIFIED BOOK DATA (from Google Books — use this as ground truth):\n'
@@ -1191,6 +2658,7 @@ async def chat_with_book(chat_req: ChatRequest, request: Request, session_token:
     # --- Guardrail: Google Search Grounding for post-cutoff books ---
     tools = None
     if is_post_cutoff_book(book):
+        types = lazy_import("google.genai.types")
         tools = [types.Tool(google_search=types.GoogleSearch())]
         system_prompt += (
             '\n\n8. SEARCH-GROUNDED MODE: This book was published recently. '
@@ -1219,12 +2687,12 @@ async def chat_with_book(chat_req: ChatRequest, request: Request, session_token:
         "system_instruction": system_prompt,
         "temperature": 0.1,
         "max_output_tokens": 2048,
-        "safety_settings": CHAT_SAFETY_SETTINGS,
+        "safety_settings": chat_safety_settings(),
     }
     if tools:
         gen_config["tools"] = tools
 
-    @observe(as_type="generation")
+    @lazy_observe(as_type="generation")
     async def generate_stream(prompt_history):
         try:
             # Yield the trace ID that was extracted synchronously
@@ -1235,10 +2703,13 @@ async def chat_with_book(chat_req: ChatRequest, request: Request, session_token:
             max_retries = 2
             backoff_delay = 3 # seconds
             
+            requested_at = time.perf_counter()
             for attempt in range(max_retries + 1):
                 try:
                     logger.info(f"🤖 Chat: Requesting model 'gemini-2.5-flash' (Google Search: {bool(tools)})")
-                    response = gemini_client.models.generate_content_stream(
+                    # PERF: Native async client — awaiting chunks yields to the event loop,
+                    # so one long generation doesn't stall other requests on this worker
+                    response = await gemini_client.aio.models.generate_content_stream(
                         model="gemini-2.5-flash", 
                         contents=prompt_history,
                         config=gen_config,
@@ -1251,15 +2722,21 @@ async def chat_with_book(chat_req: ChatRequest, request: Request, session_token:
                         continue
                     raise e # Re-raise if not 429 or out of retries
             usage_metadata = None
-            for chunk in response:
+            answer_parts = []
+            async for chunk in response:
                 if chunk.text:
+                    if not answer_parts:
+                        record_gemini_ttft("gemini-2.5-flash", time.perf_counter() - requested_at)
+                    answer_parts.append(chunk.text)
                     yield f"data: {json.dumps({'text': chunk.text})}\n\n"
                 if chunk.usage_metadata:
                     usage_metadata = chunk.usage_metadata
             
+            record_gemini_usage("gemini-2.5-flash", usage_metadata)
+            
             # Finalize Langfuse generation with token counts
-            if usage_metadata and langfuse_client:
-                langfuse_client.update_current_generation(
+            if usage_metadata and langfuse:
+                langfuse.update_current_generation(
                     usage_details={
                         "input": usage_metadata.prompt_token_count,
                         "output": usage_metadata.candidates_token_count,
@@ -1268,11 +2745,14 @@ async def chat_with_book(chat_req: ChatRequest, request: Request, session_token:
                     model="gemini-2.5-flash" # Standard name for Langfuse cost lookup
                 )
             
+            if answer_key and answer_parts:
+                _chat_answer_cache.set(answer_key, "".join(answer_parts))
+            
             yield f"data: {json.dumps({'done': True})}\n\n"
             
-            # Ensure the trace is sent immediately
-            if langfuse_client:
-                langfuse_client.flush()
+            # PERF: Trace is flushed by the background exporter, not on the request path
+            if langfuse:
+                telemetry_exporter.request_flush()
         except Exception as e:
             error_msg = str(e)
             logging.error(f"Gemini API error: {error_msg}")
@@ -1293,11 +2773,7 @@ async def chat_with_book(chat_req: ChatRequest, request: Request, session_token:
     return StreamingResponse(
         generate_stream(contents),
         media_type="text/event-stream",
-        headers={
-            "Cache-Control": "no-cache",
-            "Connection": "keep-alive",
-            "X-Accel-Buffering": "no",
-        }
+        headers=SSE_HEADERS
     )
 
 @api_router.post("/chat/score")
@@ -1305,22 +2781,23 @@ async def score_chat(score_req: ScoreRequest, request: Request, session_token: O
     """Accepts thumbs up/down rating and sends it to Langfuse"""
     user = await get_current_user(request, session_token)
     
-    langfuse_client = get_client()
-    if not langfuse_client:
+    # A score can arrive before any traced chat in this worker, so the SDK may still need importing
+    langfuse = await asyncio.to_thread(langfuse_client)
+    if not langfuse:
         return {"status": "skipped", "reason": "Langfuse not configured"}
         
-    try:
-        langfuse_client.create_score(
-            trace_id=score_req.trace_id,
-            name="user_feedback",
-            value=score_req.score,
-            comment="Thumbs Up" if score_req.score == 1 else "Thumbs Down"
-        )
-        langfuse_client.flush()
-        return {"status": "success"}
-    except Exception as e:
-        logging.error(f"Failed to submit Langfuse score: {e}")
-        raise HTTPException(status_code=500, detail="Failed to save score")
+    # PERF: Queued for the background exporter — the response doesn't wait on Langfuse
+    queued = telemetry_exporter.submit(
+        langfuse.create_score,
+        trace_id=score_req.trace_id,
+        name="user_feedback",
+        value=score_req.score,
+        comment="Thumbs Up" if score_req.score == 1 else "Thumbs Down"
+    )
+    if not queued:
+        logging.warning("Telemetry queue full — dropping chat score.")
+        return {"status": "skipped", "reason": "Telemetry queue full"}
+    return {"status": "success"}
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -1343,6 +2820,10 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Outermost, so latency includes CORS and compression
+app.add_middleware(PrometheusMiddleware)
+boot_timer.mark("app + routes")
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -1352,4 +2833,8 @@ logger = logging.getLogger(__name__)
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
-    client.close()
\ No newline at end of file
+    await close_http_client()
+    await asyncio.to_thread(telemetry_exporter.stop)
+    mark_worker_dead()
+    if client is not None:
+        client.close()
\ No newline at end of file
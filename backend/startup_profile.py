@@ -0,0 +1,95 @@
+"""
+Startup Profiling
+Phase timings for worker boot (imports, clients, startup hooks) and for
+heavy modules that are only imported on first use
+"""
+
+import asyncio
+import functools
+import importlib
+import inspect
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """
+    Records how long each boot phase took. mark(phase) closes the phase that
+    started at the previous mark, so the module can be sprinkled with marks
+    between import groups without nesting anything.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self._last = self.started
+        self.phases = []        # [(phase, seconds)] in boot order
+        self.lazy_imports = {}  # module -> seconds, loaded after boot
+        self.ready_seconds = None
+
+    def mark(self, phase: str):
+        now = time.perf_counter()
+        self.phases.append((phase, now - self._last))
+        self._last = now
+
+    def ready(self):
+        """Call once the worker can serve requests; logs the breakdown."""
+        self.ready_seconds = time.perf_counter() - self.started
+        logger.info(f"⏱️ Startup took {self.ready_seconds * 1000:.0f} ms")
+        for phase, seconds in sorted(self.phases, key=lambda p: p[1], reverse=True):
+            logger.info(f"   {phase:<32} {seconds * 1000:8.1f} ms")
+
+    def report(self) -> dict:
+        return {
+            "ready_ms": round(self.ready_seconds * 1000, 1) if self.ready_seconds is not None else None,
+            "phases_ms": {phase: round(seconds * 1000, 1) for phase, seconds in self.phases},
+            "lazy_imports_ms": {name: round(seconds * 1000, 1) for name, seconds in self.lazy_imports.items()},
+        }
+
+
+boot_timer = StartupTimer()
+
+_import_lock = threading.Lock()
+
+
+def lazy_import(name: str):
+    """Import a module on first use and record how long that first import took."""
+    with _import_lock:
+        if name in boot_timer.lazy_imports:
+            return importlib.import_module(name)
+        started = time.perf_counter()
+        module = importlib.import_module(name)
+        boot_timer.lazy_imports[name] = time.perf_counter() - started
+        logger.info(f"📦 Loaded {name} on first use in {boot_timer.lazy_imports[name] * 1000:.0f} ms")
+        return module
+
+
+def lazy_observe(**observe_kwargs):
+    """
+    Drop-in for langfuse's @observe(...) that defers importing langfuse until the
+    decorated function first runs. Keeps the function's signature (FastAPI reads it)
+    and its kind: coroutine functions stay coroutine functions, and resolve the
+    import in a worker thread so the first call doesn't block the event loop.
+    """
+    def decorator(fn):
+        observed = None
+
+        def resolve():
+            nonlocal observed
+            if observed is None:
+                observed = lazy_import("langfuse").observe(**observe_kwargs)(fn)
+            return observed
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                target = observed or await asyncio.to_thread(resolve)
+                return await target(*args, **kwargs)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                return resolve()(*args, **kwargs)
+        return wrapper
+    return decorator
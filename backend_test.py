@@ -219,12 +219,30 @@ class ImmersiveReadingAPITester:
             data=completion_data
         )
         
-        if success:
-            print(f"✅ Session completed successfully")
-            return True
-        else:
+        if not success:
             print("❌ Failed to complete session")
             return False
+        print(f"✅ Session completed successfully")
+        
+        if "streak" not in response or response["streak"].get("current_streak", 0) < 1:
+            print(f"❌ Completion response missing updated streak: {response}")
+            return False
+        
+        # A repeat completion (double submit, re-fired timer) must succeed without recounting
+        success, repeat = self.run_test(
+            "Complete Session Again",
+            "POST",
+            f"sessions/{self.session_id}/complete",
+            200,
+            data=completion_data
+        )
+        if not success:
+            return False
+        if repeat.get("minutes") != response.get("minutes") or repeat.get("streak") != response.get("streak"):
+            print(f"❌ Repeat completion changed the result: {response} -> {repeat}")
+            return False
+        print("✅ Repeat completion is idempotent")
+        return True
 
     def test_notes(self):
         """Test note creation"""
@@ -128,14 +128,11 @@ const Dashboard = ({ user }) => {
   const loadDashboardData = async () => {
     try {
       setLoadError(null);
-      const [booksRes, sessionsRes, streakRes] = await Promise.all([
-        api.get('/books'),
-        api.get('/sessions'),
-        api.get('/streak'),
-      ]);
-      setBooks(booksRes.data);
-      setSessions(sessionsRes.data);
-      setStreak(streakRes.data);
+      // One round trip (and one auth lookup) instead of /books + /sessions + /streak
+      const { data } = await api.get('/dashboard');
+      setBooks(data.books);
+      setSessions(data.sessions);
+      setStreak(data.streak);
     } catch (error) {
       console.error('Failed to load dashboard:', error);
       const isTimeout = error.code === 'ECONNABORTED';